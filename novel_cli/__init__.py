@@ -4,4 +4,6 @@ novel_cli - A command-line tool for novel management.
 
 __version__ = "0.1.0"
 
-__all__ = ["__version__"]
+from .core.novel import Chapter, Novel
+
+__all__ = ["__version__", "Chapter", "Novel"]
@@ -3,12 +3,38 @@
 Unified CLI for novel-cli.
 """
 import argparse
+import asyncio
+import json
 import sys
 from pathlib import Path
 
-from .config import DEFAULT_REF_AUDIO, DEFAULT_TTS_API
-from .core import chapter, tts, volume, clean
-from .utils.text import DEFAULT_CHAPTER_PATTERN
+from .config import DEFAULT_REF_AUDIO, DEFAULT_TTS_API, DEFAULT_TTS_PROFILE
+from .core import assemble, chapter, diff, epub, search, stats, serve, tts, tune, volume, clean
+from .utils.file import COMPRESSION_SUFFIXES, STDOUT_TARGET
+from .utils.memory import parse_size
+from .utils.text import BUILTIN_PATTERNS, combine_patterns
+
+def _int_list(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def _str_list(value):
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+
+def _non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative: {value}")
+    return number
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -21,18 +47,48 @@ def main():
     # Common arguments helper
     def add_common_args(p):
         p.add_argument('-f', '--file', required=True, type=Path, help="Path to input novel file.")
-        p.add_argument('-r', '--regex-pattern', default=DEFAULT_CHAPTER_PATTERN, help=f"Regex for chapter detection.")
+        p.add_argument(
+            '-r', '--regex-pattern', action='append', default=None,
+            help=f"Chapter heading pattern; repeat to combine. A regex, NAME=regex, or one of: {', '.join(BUILTIN_PATTERNS)} (default: chapter)."
+        )
+
+    def add_memory_arg(p):
+        p.add_argument(
+            '--max-memory', type=parse_size, default=None,
+            help="Memory budget such as 64M; selects streaming code paths and fails if it cannot be met."
+        )
+
+    def add_output_args(p):
+        p.add_argument('-o', '--output', default=None, help="Output file, or '-' for stdout (default: named after the input).")
+        p.add_argument(
+            '--compress', choices=sorted(COMPRESSION_SUFFIXES), default=None,
+            help="Compress the output file (compressed input is detected automatically)."
+        )
+        p.add_argument('--fsync', action='store_true', help="Flush the output to disk before reporting success.")
 
     # Subcommand: chapter (extract)
     parser_chapter = subparsers.add_parser('chapter', help='Extract specific chapters.')
     add_common_args(parser_chapter)
     parser_chapter.add_argument('-s', '--start-pattern', default=None, help="Start extraction from this chapter title substring.")
     parser_chapter.add_argument('-c', '--count', type=int, default=1, help="Number of chapters to extract.")
+    add_memory_arg(parser_chapter)
+    add_output_args(parser_chapter)
 
     # Subcommand: volume (mark)
     parser_volume = subparsers.add_parser('volume', help='Add volume markers.')
     add_common_args(parser_volume)
     parser_volume.add_argument('-n', '--interval', type=int, default=50, help="Chapters per volume (default: 50).")
+    add_memory_arg(parser_volume)
+    add_output_args(parser_volume)
+
+    # Subcommand: epub
+    parser_epub = subparsers.add_parser('epub', help='Export chapters as an EPUB book.')
+    add_common_args(parser_epub)
+    parser_epub.add_argument('-n', '--interval', type=int, default=50, help="Chapters per TOC volume, 0 for a flat TOC (default: 50).")
+    parser_epub.add_argument('--title', default=None, help="Book title (default: file name).")
+    parser_epub.add_argument('--author', default=None, help="Book author.")
+    parser_epub.add_argument('--language', default='zh', help="Language tag of the text (default: zh).")
+    add_memory_arg(parser_epub)
 
     # Subcommand: tts
     parser_tts = subparsers.add_parser('tts', help='Synthesize audio for chapters.')
@@ -45,68 +101,256 @@ def main():
         default=DEFAULT_REF_AUDIO, 
         help="Reference audio path on TTS server."
     )
+    parser_tts.add_argument('-j', '--concurrency', type=_positive_int, default=None, help="Chapters synthesized in parallel (default: tuned profile, else 1).")
+    parser_tts.add_argument(
+        '--stream-to',
+        default=None,
+        help="Listen-ahead mode: stream audio in reading order to this file or named pipe ('-' for stdout)."
+    )
+    parser_tts.add_argument('--changes', type=Path, default=None, help="Changes file from 'merge': only re-synthesize the chapters it lists. Not allowed with -s.")
+    parser_tts.add_argument('--prefetch', type=_non_negative_int, default=tts.DEFAULT_PREFETCH, help=f"Chapters synthesized ahead of the listener (default: {tts.DEFAULT_PREFETCH}).")
+
+    # Subcommand: tts-tune
+    parser_tune = subparsers.add_parser('tts-tune', help='Tune TTS parameters against the server.')
+    add_common_args(parser_tune)
+    parser_tune.add_argument('-s', '--start-pattern', default=None, help="Take samples starting from this chapter title substring.")
+    parser_tune.add_argument('-c', '--sample-count', type=int, default=tune.DEFAULT_SAMPLE_COUNT, help=f"Number of sample chapters (default: {tune.DEFAULT_SAMPLE_COUNT}).")
+    parser_tune.add_argument('--sample-chars', type=int, default=tune.DEFAULT_SAMPLE_CHARS, help=f"Characters per sample chapter (default: {tune.DEFAULT_SAMPLE_CHARS}).")
+    parser_tune.add_argument('--api-url', default=DEFAULT_TTS_API, help=f"TTS API endpoint (default: {DEFAULT_TTS_API})")
+    parser_tune.add_argument('--ref-audio', default=DEFAULT_REF_AUDIO, help="Reference audio path on TTS server.")
+    parser_tune.add_argument('--batch-sizes', type=_int_list, default=list(tune.DEFAULT_BATCH_SIZES), help="Comma-separated batch sizes to try.")
+    parser_tune.add_argument('--split-methods', type=_str_list, default=list(tune.DEFAULT_SPLIT_METHODS), help="Comma-separated text split methods to try.")
+    parser_tune.add_argument('--concurrencies', type=_int_list, default=list(tune.DEFAULT_CONCURRENCIES), help="Comma-separated client concurrency values to try.")
+    parser_tune.add_argument('--max-trials', type=int, default=tune.DEFAULT_MAX_TRIALS, help=f"Maximum configurations measured (default: {tune.DEFAULT_MAX_TRIALS}).")
+    parser_tune.add_argument('--profile', type=Path, default=DEFAULT_TTS_PROFILE, help=f"Profile file to write (default: {DEFAULT_TTS_PROFILE}).")
+
+    # Subcommand: tts-assemble
+    parser_assemble = subparsers.add_parser('tts-assemble', help='Join chapter audio into per-volume audiobooks.')
+    parser_assemble.add_argument('-f', '--file', required=True, type=Path, help="Path to the novel file that tts was run on.")
+    parser_assemble.add_argument('-n', '--interval', type=int, default=50, help="Chapters per volume, counted by audio file index; matches 'volume' only if tts ran without -s (default: 50).")
+    parser_assemble.add_argument('--media-type', choices=assemble.SUPPORTED_MEDIA_TYPES, default=None, help="Audio format of the chapter files (default: inferred).")
+    parser_assemble.add_argument('--markers', choices=assemble.MARKER_FORMATS, default='cue', help="Chapter marker sidecar format (default: cue).")
+
+    # Subcommand: search
+    parser_search = subparsers.add_parser('search', help='Find chapters mentioning a phrase.')
+    add_common_args(parser_search)
+    parser_search.add_argument('-q', '--query', required=True, help="Phrase to find; whitespace-separated terms must all appear.")
+    parser_search.add_argument('-l', '--limit', type=int, default=20, help="Maximum chapters listed, 0 for all (default: 20).")
+    parser_search.add_argument('--rebuild', action='store_true', help="Rebuild the index from scratch.")
+
+    # Subcommands: diff / merge (editions)
+    for name, help_text in (('diff', 'Compare two editions chapter by chapter.'),
+                            ('merge', 'Merge a new edition and list chapters to re-synthesize.')):
+        parser_edition = subparsers.add_parser(name, help=help_text)
+        add_common_args(parser_edition)
+        parser_edition.add_argument('--new', required=True, type=Path, help="Path to the new edition (-f is the old one).")
+
+    # Subcommand: stats
+    parser_stats = subparsers.add_parser('stats', help='Report per-chapter statistics.')
+    add_common_args(parser_stats)
+    parser_stats.add_argument('--json', action='store_true', help="Print the report as JSON.")
+    parser_stats.add_argument('--per-chapter', action='store_true', help="Include one row per chapter.")
+    parser_stats.add_argument(
+        '--chars-per-second', type=float, default=stats.DEFAULT_CHARS_PER_SECOND,
+        help=f"Speaking rate for duration estimates (default: {stats.DEFAULT_CHARS_PER_SECOND})."
+    )
 
     # Subcommand: clean (dedupe)
     parser_clean = subparsers.add_parser('clean', help='Remove duplicate chapters.')
     add_common_args(parser_clean)
     parser_clean.add_argument('--config', type=Path, default=None, help="Path to JSON config file for text replacements.")
+    add_memory_arg(parser_clean)
+    add_output_args(parser_clean)
 
 
+    # Subcommand: serve (daemon)
+    parser_serve = subparsers.add_parser('serve', help='Serve chapter queries over a local socket.')
+    parser_serve.add_argument('--socket', type=Path, default=None, help="Unix socket path (line-delimited JSON).")
+    parser_serve.add_argument('--port', type=int, default=8765, help="Localhost HTTP port when no socket is given (default: 8765).")
+    parser_serve.add_argument('--cache-size', type=int, default=serve.DEFAULT_CACHE_SIZE, help=f"Novel indexes kept in memory (default: {serve.DEFAULT_CACHE_SIZE}).")
+    parser_serve.add_argument('--root', type=Path, default=Path.cwd(), help="Only serve files under this directory (default: current directory).")
+    parser_serve.add_argument('--api-url', default=DEFAULT_TTS_API, help=f"TTS API endpoint for tts jobs (default: {DEFAULT_TTS_API})")
+    parser_serve.add_argument('--ref-audio', default=DEFAULT_REF_AUDIO, help="Reference audio path on TTS server.")
+
     args = parser.parse_args()
 
     if not args.command:
         parser.print_help()
         sys.exit(1)
 
+    if args.command == 'serve':
+        where = args.socket or f"http://127.0.0.1:{args.port}"
+        print(f"Serving on: {where}")
+        try:
+            asyncio.run(serve.serve(
+                socket_path=args.socket,
+                port=args.port,
+                cache_size=args.cache_size,
+                root=args.root,
+                api_url=args.api_url,
+                ref_audio_path=args.ref_audio
+            ))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # Not every subcommand takes -r
+    if hasattr(args, 'regex_pattern'):
+        args.regex_pattern = combine_patterns(args.regex_pattern or [])
+
     try:
         input_file = args.file
         if not input_file.exists():
             print(f"Error: File '{input_file}' not found.")
             sys.exit(1)
             
+        # Text goes to stdout when writing there, so report on stderr
+        out = sys.stderr if getattr(args, 'output', None) == STDOUT_TARGET else sys.stdout
+
         if args.command == 'chapter':
-            print(f"Extracting from: {input_file}")
+            print(f"Extracting from: {input_file}", file=out)
             result = chapter.extract(
                 input_path=input_file,
                 start_pattern=args.start_pattern,
                 count=args.count,
-                regex_pattern=args.regex_pattern
+                regex_pattern=args.regex_pattern,
+                max_memory=args.max_memory,
+                compression=args.compress,
+                output_path=args.output,
+                fsync=args.fsync
             )
             if result:
-                print(f"Success! Saved to: {result}")
+                print(f"Success! Saved to: {result}", file=out)
             else:
-                print("Error: Start chapter not found.")
+                print("Error: Start chapter not found.", file=out)
                 sys.exit(1)
 
         elif args.command == 'volume':
-            print(f"Adding volume markers to: {input_file}")
+            print(f"Adding volume markers to: {input_file}", file=out)
             result = volume.add_markers(
                 input_path=input_file,
                 volume_step=args.interval,
-                regex_pattern=args.regex_pattern
+                regex_pattern=args.regex_pattern,
+                max_memory=args.max_memory,
+                compression=args.compress,
+                output_path=args.output,
+                fsync=args.fsync
             )
-            print(f"Success! Saved to: {result}")
+            print(f"Success! Saved to: {result}", file=out)
             
+        elif args.command == 'epub':
+            print(f"Exporting EPUB from: {input_file}")
+            result = epub.export_epub(
+                input_path=input_file,
+                volume_step=args.interval,
+                regex_pattern=args.regex_pattern,
+                title=args.title,
+                author=args.author,
+                language=args.language,
+                max_memory=args.max_memory
+            )
+            print(f"Success! Saved to: {result}")
+
         elif args.command == 'tts':
-            print(f"Starting TTS for: {input_file}")
+            # Audio goes to stdout when streaming there, so report on stderr
+            out = sys.stderr if args.stream_to == '-' else sys.stdout
+            print(f"Starting TTS for: {input_file}", file=out)
             result_dir = tts.process_tts(
                 input_path=input_file,
                 start_pattern=args.start_pattern,
                 count=args.count,
                 api_url=args.api_url,
                 ref_audio_path=args.ref_audio,
-                regex_pattern=args.regex_pattern
+                regex_pattern=args.regex_pattern,
+                concurrency=args.concurrency,
+                stream_to=args.stream_to,
+                prefetch=args.prefetch,
+                only=diff.load_resynthesize(args.changes) if args.changes else None
             )
-            print(f"TTS processing complete. Output in: {result_dir}")
+            print(f"TTS processing complete. Output in: {result_dir}", file=out)
             
+        elif args.command == 'tts-tune':
+            print(f"Tuning TTS against: {args.api_url}")
+            result = tune.tune_tts(
+                input_path=input_file,
+                api_url=args.api_url,
+                ref_audio_path=args.ref_audio,
+                start_pattern=args.start_pattern,
+                sample_count=args.sample_count,
+                sample_chars=args.sample_chars,
+                regex_pattern=args.regex_pattern,
+                batch_sizes=args.batch_sizes,
+                split_methods=args.split_methods,
+                concurrencies=args.concurrencies,
+                max_trials=args.max_trials,
+                profile_path=args.profile
+            )
+            print(f"Success! Profile saved to: {result}")
+
+        elif args.command == 'tts-assemble':
+            print(f"Assembling volumes for: {input_file}")
+            result = assemble.assemble_volumes(
+                input_path=input_file,
+                volume_step=args.interval,
+                media_type=args.media_type,
+                marker_format=args.markers
+            )
+            print(f"Success! Saved to: {result}")
+
+        elif args.command == 'search':
+            if args.rebuild:
+                search.build_index(input_file, args.regex_pattern)
+            hits = search.search(
+                input_path=input_file,
+                query=args.query,
+                regex_pattern=args.regex_pattern,
+                limit=args.limit
+            )
+            for hit in hits:
+                print(f"[{hit.number}] {hit.title} ({hit.count}): {hit.snippet}")
+            if not hits:
+                print("No matches.")
+
+        elif args.command == 'diff':
+            report = diff.diff_editions(input_file, args.new, args.regex_pattern)
+            for kind in ('added', 'removed', 'changed', 'moved'):
+                for entry in report[kind]:
+                    print(f"{kind:8} {entry['number']:>6} {entry['title']}")
+            print(
+                f"{len(report['added'])} added, {len(report['removed'])} removed, "
+                f"{len(report['changed'])} changed, {len(report['moved'])} moved, "
+                f"{report['unchanged']} unchanged"
+            )
+
+        elif args.command == 'merge':
+            print(f"Merging {args.new} into: {input_file}")
+            merged, changes = diff.merge_editions(input_file, args.new, args.regex_pattern)
+            print(f"Success! Saved to: {merged}")
+            print(f"Changed chapters listed in: {changes}")
+
+        elif args.command == 'stats':
+            report = stats.summarize(
+                stats.collect_stats(input_file, args.regex_pattern),
+                chars_per_second=args.chars_per_second,
+                per_chapter=args.per_chapter
+            )
+            if args.json:
+                print(json.dumps(report, ensure_ascii=False, indent=2))
+            else:
+                print(stats.format_summary(report))
+
         elif args.command == 'clean':
-            print(f"Cleaning duplicates in: {input_file}")
+            print(f"Cleaning duplicates in: {input_file}", file=out)
             result = clean.deduplicate_chapters(
                 input_path=input_file,
                 regex_pattern=args.regex_pattern,
-                config_path=args.config
+                config_path=args.config,
+                max_memory=args.max_memory,
+                compression=args.compress,
+                output_path=args.output,
+                fsync=args.fsync
             )
-            print(f"Success! Saved to: {result}")
+            print(f"Success! Saved to: {result}", file=out)
 
     except Exception as e:
         print(f"Error: {e}")
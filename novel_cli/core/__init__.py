@@ -1,6 +1,6 @@
 """
 Core modules for novel-cli.
 """
-from . import chapter, tts, volume
+from . import assemble, atts, chapter, diff, epub, novel, search, serve, stats, tts, tune, volume
 
-__all__ = ["chapter", "volume", "tts"]
+__all__ = ["chapter", "novel", "volume", "tts", "atts", "tune", "assemble", "search", "diff", "epub", "serve", "stats"]
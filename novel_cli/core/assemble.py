@@ -0,0 +1,217 @@
+"""
+Core logic for joining per-chapter TTS audio into per-volume audiobooks.
+
+Audio is concatenated at the container level without re-encoding: ADTS frames
+are copied back to back for AAC, and PCM payloads are joined under a rewritten
+header for WAV.
+"""
+import logging
+import re
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from ..utils.audio import COPY_CHUNK_SIZE, copy_adts_frames, read_wav_header, wav_byte_rate, write_wav_header
+from ..utils.file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Chapter audio written by `tts`: 0001_title.ext
+CHAPTER_AUDIO_PATTERN = re.compile(r"^(\d+)_(.*)$")
+
+SUPPORTED_MEDIA_TYPES = ("aac", "wav")
+MARKER_FORMATS = ("cue", "ffmetadata")
+
+
+def collect_chapter_audio(tts_dir: Path, media_type: str) -> List[Tuple[int, str, Path]]:
+    """
+    Lists the chapter audio files in `tts_dir` sorted by chapter index.
+
+    Returns:
+        List of (chapter_index, title, path).
+    """
+    chapters = []
+    for path in tts_dir.glob(f"*.{media_type}"):
+        match = CHAPTER_AUDIO_PATTERN.match(path.stem)
+        if match:
+            chapters.append((int(match.group(1)), match.group(2), path))
+    chapters.sort()
+    return chapters
+
+
+def _detect_media_type(tts_dir: Path) -> str:
+    present = [ext for ext in SUPPORTED_MEDIA_TYPES if collect_chapter_audio(tts_dir, ext)]
+    if len(present) != 1:
+        found = ", ".join(present) or "none"
+        raise ValueError(f"Cannot infer media type from {tts_dir} (found: {found}); pass media_type")
+    return present[0]
+
+
+def _copy_exact(src: BinaryIO, dst: BinaryIO, length: int) -> None:
+    while length > 0:
+        chunk = src.read(min(length, COPY_CHUNK_SIZE))
+        if not chunk:
+            break
+        dst.write(chunk)
+        length -= len(chunk)
+
+
+def _join_aac(paths: List[Path], out: BinaryIO) -> List[float]:
+    """Concatenates ADTS streams; returns each input's duration in seconds."""
+    durations = []
+    stream_rate = 0
+    for path in paths:
+        with path.open('rb') as src:
+            samples, rate = copy_adts_frames(src, out)
+        if not rate:
+            logger.warning(f"No ADTS frames in {path.name}")
+        elif stream_rate and rate != stream_rate:
+            raise ValueError(f"{path.name} is {rate} Hz, expected {stream_rate} Hz")
+        stream_rate = stream_rate or rate
+        durations.append(samples / rate if rate else 0.0)
+    return durations
+
+
+def _join_wav(paths: List[Path], out: BinaryIO) -> List[float]:
+    """Concatenates PCM payloads under one header; returns each input's duration."""
+    durations = []
+    stream_fmt = b""
+    total = 0
+    for path in paths:
+        with path.open('rb') as src:
+            fmt, _, length = read_wav_header(src)
+            if not stream_fmt:
+                stream_fmt = fmt
+                # Placeholder sizes, rewritten once the total is known
+                write_wav_header(out, stream_fmt, 0)
+            elif fmt != stream_fmt:
+                raise ValueError(f"{path.name} has a different PCM format")
+            _copy_exact(src, out, length)
+        total += length
+        byte_rate = wav_byte_rate(fmt)
+        durations.append(length / byte_rate if byte_rate else 0.0)
+
+    if stream_fmt:
+        out.seek(0)
+        write_wav_header(out, stream_fmt, total)
+    return durations
+
+
+def _cue_time(seconds: float) -> str:
+    """Formats seconds as CUE mm:ss:ff (75 frames per second)."""
+    frames = int(round(seconds * 75))
+    minutes, frames = divmod(frames, 60 * 75)
+    secs, frames = divmod(frames, 75)
+    return f"{minutes:02d}:{secs:02d}:{frames:02d}"
+
+
+def _ffmeta_escape(value: str) -> str:
+    return re.sub(r"([=;#\\\n])", r"\\\1", value)
+
+
+def format_markers(
+    marker_format: str,
+    album: str,
+    audio_name: str,
+    titles: List[str],
+    durations: List[float]
+) -> str:
+    """
+    Renders chapter markers as a CUE sheet or an FFmpeg metadata file.
+    """
+    starts = []
+    position = 0.0
+    for duration in durations:
+        starts.append(position)
+        position += duration
+
+    if marker_format == "cue":
+        lines = [f'TITLE "{album}"', f'FILE "{audio_name}" WAVE']
+        for track, (title, start) in enumerate(zip(titles, starts), 1):
+            lines.append(f"  TRACK {track:02d} AUDIO")
+            lines.append(f'    TITLE "{title}"')
+            lines.append(f"    INDEX 01 {_cue_time(start)}")
+    else:
+        lines = [";FFMETADATA1", f"title={_ffmeta_escape(album)}"]
+        for title, start, duration in zip(titles, starts, durations):
+            lines += [
+                "[CHAPTER]",
+                "TIMEBASE=1/1000",
+                f"START={int(start * 1000)}",
+                f"END={int((start + duration) * 1000)}",
+                f"title={_ffmeta_escape(title)}",
+            ]
+    return "\n".join(lines) + "\n"
+
+
+def assemble_volumes(
+    input_path: Union[str, Path],
+    volume_step: int = 50,
+    media_type: Optional[str] = None,
+    marker_format: str = "cue"
+) -> str:
+    """
+    Joins the chapter audio in `<stem>_tts` into one file per volume.
+
+    Chapters are grouped with the same interval as `volume.add_markers`: volume
+    k holds chapter indexes (k-1)*volume_step+1 .. k*volume_step. The indexes
+    are the `NNNN_` prefixes of the audio files, which `tts` counts from the
+    chapter it started at, so the grouping matches `volume` only for audio
+    synthesized from the first chapter (no `start_pattern`). Each volume
+    gets a sidecar marker file with one entry per chapter. Inputs are streamed,
+    so memory stays constant regardless of audiobook length.
+
+    Args:
+        input_path: Path to the novel file that `tts` was run on.
+        volume_step: Number of chapters per volume.
+        media_type: "aac" or "wav"; inferred from the files when omitted.
+        marker_format: "cue" or "ffmetadata".
+
+    Returns:
+        Path to the output directory as a string.
+    """
+    if volume_step <= 0:
+        raise ValueError("volume_step must be positive")
+    if marker_format not in MARKER_FORMATS:
+        raise ValueError(f"Unsupported marker format: {marker_format}")
+
+    input_file = Path(input_path)
+    tts_dir = input_file.parent / f"{input_file.stem}_tts"
+    if not tts_dir.is_dir():
+        raise FileNotFoundError(f"TTS output directory not found: {tts_dir}")
+
+    media_type = media_type or _detect_media_type(tts_dir)
+    if media_type not in SUPPORTED_MEDIA_TYPES:
+        raise ValueError(f"Unsupported media type: {media_type}")
+
+    volumes: Dict[int, List[Tuple[int, str, Path]]] = {}
+    for chapter in collect_chapter_audio(tts_dir, media_type):
+        volumes.setdefault((chapter[0] - 1) // volume_step + 1, []).append(chapter)
+    if not volumes:
+        raise ValueError(f"No .{media_type} chapter files in {tts_dir}")
+
+    output_dir = input_file.parent / f"{input_file.stem}_audiobook"
+    output_dir.mkdir(exist_ok=True)
+    join = _join_aac if media_type == "aac" else _join_wav
+    marker_ext = "cue" if marker_format == "cue" else "ffmeta"
+
+    for volume_num, chapters in sorted(volumes.items()):
+        expected = chapters[-1][0] - (volume_num - 1) * volume_step
+        if len(chapters) < expected:
+            logger.warning(f"Volume {volume_num} is missing {expected - len(chapters)} chapter(s)")
+
+        audio_path = output_dir / f"{input_file.stem}_vol{volume_num:03d}.{media_type}"
+        with atomic_write(audio_path) as temp_path:
+            with temp_path.open('wb') as out:
+                durations = join([path for _, _, path in chapters], out)
+
+        markers = format_markers(
+            marker_format,
+            f"{input_file.stem} 第{volume_num}卷",
+            audio_path.name,
+            [title for _, title, _ in chapters],
+            durations
+        )
+        with atomic_write(audio_path.with_suffix(f".{marker_ext}")) as temp_path:
+            temp_path.write_text(markers, encoding='utf-8')
+
+    return str(output_dir)
@@ -0,0 +1,299 @@
+"""
+Asyncio TTS API for embedding in event-loop services.
+
+Mirrors `tts.process_tts` without blocking the loop: HTTP is spoken directly
+over `asyncio` streams, file reads run in worker threads, and progress is
+reported through events instead of stdout.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import ssl
+import urllib.parse
+from contextlib import aclosing
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, NamedTuple, Optional, Union
+
+from .chapter import iter_chapters
+from .tts import (
+    DEFAULT_TIMEOUT,
+    MAX_RETRIES,
+    STREAM_CHUNK_SIZE,
+    build_payload_template,
+    chapter_audio_path,
+    load_profile,
+)
+from ..utils.file import atomic_write
+from ..utils.text import DEFAULT_CHAPTER_PATTERN
+
+logger = logging.getLogger(__name__)
+
+
+class TTSHTTPError(Exception):
+    """Raised when the TTS server answers with a non-200 status."""
+
+    def __init__(self, status: int, reason: str = ""):
+        super().__init__(f"HTTP {status} {reason}".strip())
+        self.status = status
+
+
+class TTSEvent(NamedTuple):
+    """
+    Progress event for one chapter.
+
+    status is one of "completed", "skipped" (already on disk) or "failed".
+    """
+    title: str
+    idx: int
+    status: str
+    path: Optional[Path]
+    error: Optional[str] = None
+
+
+ProgressCallback = Callable[[TTSEvent], Union[None, Awaitable[None]]]
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    while True:
+        line = await asyncio.wait_for(reader.readline(), DEFAULT_TIMEOUT)
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+async def astream_audio(
+    text: str,
+    api_url: str,
+    payload_template: Dict[str, Any]
+) -> AsyncIterator[bytes]:
+    """
+    Posts `text` to the TTS server and yields the audio body as it arrives.
+
+    Raises:
+        TTSHTTPError: The server answered with a non-200 status.
+        OSError, asyncio.TimeoutError, asyncio.IncompleteReadError: Transport failures.
+        ValueError: Malformed chunk sizes or Content-Length.
+    """
+    url = urllib.parse.urlsplit(api_url)
+    secure = url.scheme == "https"
+    port = url.port or (443 if secure else 80)
+    target = url.path or "/"
+    if url.query:
+        target += f"?{url.query}"
+
+    payload = payload_template.copy()
+    payload["text"] = text
+    body = json.dumps(payload).encode('utf-8')
+
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(
+            url.hostname, port, ssl=ssl.create_default_context() if secure else None
+        ),
+        DEFAULT_TIMEOUT
+    )
+    try:
+        writer.write(
+            f"POST {target} HTTP/1.1\r\n"
+            f"Host: {url.netloc}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+        status_line = await asyncio.wait_for(reader.readline(), DEFAULT_TIMEOUT)
+        parts = status_line.decode('latin-1').split(None, 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ConnectionError(f"Malformed status line: {status_line!r}")
+        status = int(parts[1])
+        headers = await _read_headers(reader)
+        if status != 200:
+            raise TTSHTTPError(status, parts[2].strip() if len(parts) > 2 else "")
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                size_line = await asyncio.wait_for(reader.readline(), DEFAULT_TIMEOUT)
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    await _read_headers(reader)
+                    return
+                while size:
+                    chunk = await asyncio.wait_for(
+                        reader.readexactly(min(size, STREAM_CHUNK_SIZE)), DEFAULT_TIMEOUT
+                    )
+                    size -= len(chunk)
+                    yield chunk
+                await asyncio.wait_for(reader.readexactly(2), DEFAULT_TIMEOUT)
+        elif "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining:
+                chunk = await asyncio.wait_for(
+                    reader.readexactly(min(remaining, STREAM_CHUNK_SIZE)), DEFAULT_TIMEOUT
+                )
+                remaining -= len(chunk)
+                yield chunk
+        else:
+            while chunk := await asyncio.wait_for(reader.read(STREAM_CHUNK_SIZE), DEFAULT_TIMEOUT):
+                yield chunk
+    finally:
+        writer.close()
+
+
+async def asynthesize_chapter(
+    text: str,
+    title: str,
+    idx: int,
+    output_dir: Path,
+    api_url: str,
+    payload_template: Dict[str, Any]
+) -> TTSEvent:
+    """
+    Async counterpart of `tts._tts_worker` for a single chapter.
+
+    Audio is streamed into a temp file that only replaces the final path once
+    complete, so cancelling the task never leaves a truncated chapter behind.
+    Transport errors and malformed responses are retried with backoff; HTTP
+    errors are not.
+    """
+    ext = payload_template.get("media_type", "wav")
+    file_name = chapter_audio_path(output_dir, idx, title, ext)
+
+    if file_name.exists():
+        return TTSEvent(title, idx, "skipped", file_name)
+
+    error = ""
+    for attempt in range(MAX_RETRIES):
+        try:
+            with atomic_write(file_name) as temp_path:
+                with temp_path.open('wb') as f:
+                    async with aclosing(astream_audio(text, api_url, payload_template)) as stream:
+                        async for chunk in stream:
+                            await asyncio.to_thread(f.write, chunk)
+            return TTSEvent(title, idx, "completed", file_name)
+        except TTSHTTPError as e:
+            error = str(e)
+            logger.error(f"Failed {title}: {e}")
+            if 400 <= e.status < 500:
+                break
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            error = str(e) or type(e).__name__
+            logger.warning(f"Attempt {attempt + 1}/{MAX_RETRIES} failed for {title}: {error}")
+        if attempt < MAX_RETRIES - 1:
+            await asyncio.sleep(2 * (attempt + 1))  # Backoff
+
+    return TTSEvent(title, idx, "failed", None, error)
+
+
+async def aiter_tts(
+    input_path: Union[str, Path],
+    start_pattern: Optional[str],
+    count: int,
+    api_url: str,
+    ref_audio_path: str,
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+    concurrency: Optional[int] = None,
+    profile_path: Optional[Path] = None
+) -> AsyncIterator[TTSEvent]:
+    """
+    Synthesizes chapters concurrently and yields a `TTSEvent` as each finishes.
+
+    At most `concurrency` requests run at once for this call (defaulting to the
+    tuned profile, or 1), and chapters are read ahead only as far as the workers
+    need them. Closing the iterator or cancelling the consuming task cancels all
+    in-flight requests.
+    """
+    input_file = Path(input_path)
+    output_dir = input_file.parent / f"{input_file.stem}_tts"
+    await asyncio.to_thread(output_dir.mkdir, exist_ok=True)
+
+    profile = await asyncio.to_thread(load_profile, api_url, profile_path)
+    payload_template = build_payload_template(ref_audio_path, profile)
+    workers = max(1, concurrency or int(profile.get("concurrency", 1)))
+
+    todo: asyncio.Queue = asyncio.Queue(maxsize=workers)
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def produce() -> None:
+        chapters = iter_chapters(input_file, start_pattern, count, regex_pattern)
+        try:
+            while (item := await asyncio.to_thread(next, chapters, None)) is not None:
+                await todo.put(item)
+        finally:
+            # When cancelled, the workers are being cancelled too; waiting for
+            # room in a full queue would then never return
+            if not asyncio.current_task().cancelling():
+                for _ in range(workers):
+                    await todo.put(None)
+
+    async def work() -> None:
+        try:
+            while (item := await todo.get()) is not None:
+                title, content, idx = item
+                await events.put(await asynthesize_chapter(
+                    content, title, idx, output_dir, api_url, payload_template
+                ))
+        finally:
+            # Always check out, so an unexpected error surfaces from gather
+            # below instead of leaving the consumer waiting
+            events.put_nowait(None)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(work()) for _ in range(workers)]
+    try:
+        running = workers
+        while running:
+            event = await events.get()
+            if event is None:
+                running -= 1
+            else:
+                yield event
+        # Surface errors from reading the novel
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def aprocess_tts(
+    input_path: Union[str, Path],
+    start_pattern: Optional[str],
+    count: int,
+    api_url: str,
+    ref_audio_path: str,
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+    concurrency: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    profile_path: Optional[Path] = None
+) -> str:
+    """
+    Async counterpart of `tts.process_tts`.
+
+    Args:
+        input_path: Path to novel file.
+        start_pattern: Start chapter pattern.
+        count: Number of chapters to process.
+        api_url: TTS API endpoint.
+        ref_audio_path: Path to reference audio on the TTS server.
+        regex_pattern: Regex for chapter detection.
+        concurrency: Maximum concurrent requests for this call.
+        on_progress: Called (or awaited, if it is a coroutine function) with a
+            `TTSEvent` for every chapter.
+        profile_path: Profile file written by `tts-tune`.
+
+    Returns:
+        Path to the output directory as a string.
+    """
+    input_file = Path(input_path)
+    async for event in aiter_tts(
+        input_file, start_pattern, count, api_url, ref_audio_path,
+        regex_pattern, concurrency, profile_path
+    ):
+        if on_progress is not None:
+            result = on_progress(event)
+            if inspect.isawaitable(result):
+                await result
+    return str(input_file.parent / f"{input_file.stem}_tts")
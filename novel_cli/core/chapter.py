@@ -1,127 +1,170 @@
 """
 Core logic for extracting chapters from novel files.
 """
+import itertools
 import logging
-import re
 from pathlib import Path
 from typing import Generator, List, Optional, Tuple, Union
 
-from ..utils.file import atomic_write
-from ..utils.text import DEFAULT_CHAPTER_PATTERN, detect_encoding, sanitize_filename
+from ..utils.file import compressed_path, open_input, open_sink, plain_path, replace_file
+from ..utils.memory import MemoryBudgetError, check_budget, iter_bounded_lines, max_text_chars, write_buffer_size
+from ..utils.text import DEFAULT_CHAPTER_PATTERN, detect_encoding, get_chapter_matcher, sanitize_filename
 
 logger = logging.getLogger(__name__)
 
 
-def iter_chapters(
-    input_path: Union[str, Path],
+def _iter_chapter_lines(
+    input_file: Path,
     start_pattern: Optional[str],
     count: int,
-    regex_pattern: str = DEFAULT_CHAPTER_PATTERN
+    regex_pattern: str,
+    max_memory: Optional[int]
 ) -> Generator[Tuple[str, str, int], None, None]:
     """
-    Generator that iterates over chapters in the novel file.
+    Streams the lines of the selected chapters without buffering them.
 
     Yields:
-        Tuple[str, str, int]: (chapter_title, chapter_content, chapter_index)
-        chapter_index is 1-based index of the extracted chapter.
+        Tuple[str, str, int]: (chapter_title, line, chapter_index) for every
+        line from the starting chapter's title up to the end of the last one.
     """
-    input_file = Path(input_path)
     encoding = detect_encoding(input_file)
-    
-    chapter_regex = re.compile(regex_pattern)
+    match_chapter = get_chapter_matcher(regex_pattern).match
 
     found_start = False
     chapters_extracted = 0
     current_title = ""
-    current_content: List[str] = []
 
     try:
-        with input_file.open('r', encoding=encoding) as infile:
-            for line in infile:
-                match = chapter_regex.match(line)
-
-                if match:
+        with open_input(input_file, 'r', encoding=encoding) as infile:
+            for line in iter_bounded_lines(infile, max_memory):
+                if match_chapter(line):
                     # Use the full line as the title, not just the matching prefix
                     new_title = line.strip()
-                    
+
                     # If we haven't found the start yet
                     if not found_start:
                         if start_pattern is None or start_pattern in new_title:
                             found_start = True
-                            current_title = new_title
-                            current_content = [line]
-                        continue
-                    
-                    # We have found the start, thus we have a previous chapter to yield
-                    chapters_extracted += 1
-                    yield current_title, "".join(current_content), chapters_extracted
-
-                    if count > 0 and chapters_extracted >= count:
-                        current_title = ""
-                        current_content = []
+                        else:
+                            continue
+                    elif count > 0 and chapters_extracted >= count:
                         return
 
+                    chapters_extracted += 1
                     current_title = new_title
-                    current_content = [line]
-                
-                elif found_start:
-                    current_content.append(line)
 
-            # Yield last chapter if we are still collecting
-            if found_start and current_title:
-                 chapters_extracted += 1
-                 yield current_title, "".join(current_content), chapters_extracted
+                if found_start:
+                    yield current_title, line, chapters_extracted
 
     except (IOError, OSError) as e:
         logger.error("Error reading file: %s", e)
         raise
 
 
+def iter_chapters(
+    input_path: Union[str, Path],
+    start_pattern: Optional[str],
+    count: int,
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+    max_memory: Optional[int] = None
+) -> Generator[Tuple[str, str, int], None, None]:
+    """
+    Generator that iterates over chapters in the novel file.
+
+    With `max_memory` set, a chapter too large to buffer within the budget
+    raises `MemoryBudgetError` instead of being read in.
+
+    Yields:
+        Tuple[str, str, int]: (chapter_title, chapter_content, chapter_index)
+        chapter_index is 1-based index of the extracted chapter.
+    """
+    check_budget(max_memory)
+    limit = max_text_chars(max_memory) if max_memory is not None else None
+
+    current_title = ""
+    current_content: List[str] = []
+    current_idx = 0
+    buffered = 0
+
+    for title, line, idx in _iter_chapter_lines(Path(input_path), start_pattern, count, regex_pattern, max_memory):
+        if idx != current_idx:
+            if current_title:
+                yield current_title, "".join(current_content), current_idx
+            current_title, current_content, current_idx, buffered = title, [], idx, 0
+
+        current_content.append(line)
+        if limit is not None:
+            buffered += len(line)
+            if buffered > limit:
+                raise MemoryBudgetError(
+                    f"Chapter '{title}' is longer than {limit} characters and does not fit "
+                    f"a memory budget of {max_memory} bytes"
+                )
+
+    # Yield last chapter if we are still collecting
+    if current_title:
+        yield current_title, "".join(current_content), current_idx
+
+
 def extract(
     input_path: Union[str, Path],
     start_pattern: Optional[str],
     count: int,
-    regex_pattern: str = DEFAULT_CHAPTER_PATTERN
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+    max_memory: Optional[int] = None,
+    compression: Optional[str] = None,
+    output_path: Optional[Union[str, Path]] = None,
+    fsync: bool = False
 ) -> Optional[str]:
     """
     Streams the input file, finds the starting chapter, and writes N chapters to a file.
+    Lines are copied as they are read, so no chapter is held in memory.
+    The output is compressed when `compression` ("gzip", "xz", "bz2") is given.
+
+    By default the output is named after the first and last chapter; pass
+    `output_path` to choose it, or "-" for stdout. `fsync` makes the write
+    durable before returning.
+
     Returns the path to the output file as a string.
     """
+    check_budget(max_memory)
     input_file = Path(input_path)
+    named = plain_path(input_file)
+
+    lines = _iter_chapter_lines(input_file, start_pattern, count, regex_pattern, max_memory)
+    # Find the start chapter before opening the sink, so a failed search
+    # leaves an existing output file untouched
+    first = next(lines, None)
+    if first is None:
+        return None
 
-    first_chapter_title = None
-    last_chapter_title = None
-    chapters_found = 0
+    first_chapter_title = first[0]
+    last_chapter_title = first_chapter_title
 
     # Determine final filename after we know the chapters
     # Use a placeholder that we'll rename
-    temp_final = input_file.parent / f"{input_file.stem}_extract_temp{input_file.suffix}"
-
-    with atomic_write(temp_final) as temp_path:
-        with temp_path.open('w', encoding='utf-8') as outfile:
-            for title, content, idx in iter_chapters(input_file, start_pattern, count, regex_pattern):
-                if idx == 1:
-                    first_chapter_title = title
-                last_chapter_title = title
-                outfile.write(content)
-                chapters_found += 1
-
-    if chapters_found > 0 and first_chapter_title:
-        safe_start = sanitize_filename(first_chapter_title)
-        safe_end = sanitize_filename(last_chapter_title) if last_chapter_title else safe_start
-
-        if safe_start == safe_end or count == 1:
-            final_filename = input_file.with_name(f"{input_file.stem}_{safe_start}{input_file.suffix}")
-        else:
-            final_filename = input_file.with_name(f"{input_file.stem}_{safe_start}_{safe_end}{input_file.suffix}")
-
-        # Rename from temp_final to actual final name
-        if final_filename.exists():
-            final_filename.unlink()
-        temp_final.rename(final_filename)
-        return str(final_filename)
+    if output_path is None:
+        target = compressed_path(named.with_name(f"{named.stem}_extract_temp{named.suffix}"), compression)
     else:
-        # Clean up if nothing was extracted
-        if temp_final.exists():
-            temp_final.unlink()
-        return None
+        target = output_path
+
+    with open_sink(target, 'utf-8', compression, fsync, write_buffer_size(max_memory)) as outfile:
+        for title, line, _ in itertools.chain([first], lines):
+            last_chapter_title = title
+            outfile.write(line)
+
+    if output_path is not None:
+        return str(output_path)
+
+    safe_start = sanitize_filename(first_chapter_title)
+    safe_end = sanitize_filename(last_chapter_title)
+
+    if safe_start == safe_end or count == 1:
+        final_filename = named.with_name(f"{named.stem}_{safe_start}{named.suffix}")
+    else:
+        final_filename = named.with_name(f"{named.stem}_{safe_start}_{safe_end}{named.suffix}")
+    final_filename = compressed_path(final_filename, compression)
+
+    # Rename from the placeholder to the actual final name
+    replace_file(target, final_filename, fsync)
+    return str(final_filename)
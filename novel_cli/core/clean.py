@@ -3,8 +3,10 @@ Core logic for cleaning duplicate chapters in novel files.
 """
 import json
 from pathlib import Path
-from novel_cli.utils.text import get_chapter_match, detect_encoding
-from novel_cli.utils.file import atomic_write
+from typing import Iterable, TextIO
+from novel_cli.utils.text import get_chapter_matcher, detect_encoding
+from novel_cli.utils.file import compressed_path, open_input, open_sink, plain_path
+from novel_cli.utils.memory import check_budget, iter_bounded_lines, write_buffer_size
 
 # Default replacements for common typos
 DEFAULT_REPLACEMENTS = {
@@ -45,6 +47,15 @@ def load_replacements(config_path: Path | None = None) -> dict[str, str]:
 
     return replacements
 
+def correct_line(line: str, replacements: dict[str, str]) -> str:
+    """
+    Apply text replacements to a single line.
+    """
+    for old, new in replacements.items():
+        if old in line:
+            line = line.replace(old, new)
+    return line
+
 def apply_corrections(lines: list[str], replacements: dict[str, str]) -> list[str]:
     """
     Apply text replacements to a list of lines.
@@ -52,13 +63,31 @@ def apply_corrections(lines: list[str], replacements: dict[str, str]) -> list[st
     if not replacements:
         return lines
 
-    corrected_lines = []
-    for line in lines:
-        for old, new in replacements.items():
-            if old in line:
-                line = line.replace(old, new)
-        corrected_lines.append(line)
-    return corrected_lines
+    return [correct_line(line, replacements) for line in lines]
+
+def find_duplicate_titles(titles: Iterable[tuple[int, str]]) -> set[int]:
+    """
+    Picks the chapter title lines to delete from (line_index, line) pairs in file order.
+
+    Each title is compared with the previous surviving one. If their stripped
+    contents are identical, the one with more leading indentation is dropped
+    (the later one on a tie). Only the current title is kept, so the titles
+    can be streamed.
+    """
+    to_delete = set()
+    current = None  # (line_index, content, indent)
+
+    for idx, line in titles:
+        chapter = (idx, line.strip(), len(line) - len(line.lstrip()))
+        if current is not None and current[1] == chapter[1]:
+            # Duplicate found! Prefer the one with less indentation
+            if current[2] <= chapter[2]:
+                to_delete.add(idx)
+                continue
+            to_delete.add(current[0])
+        current = chapter
+
+    return to_delete
 
 def clean_content(lines: list[str], regex_pattern: str, replacements: dict[str, str]) -> list[str]:
     """
@@ -76,73 +105,102 @@ def clean_content(lines: list[str], regex_pattern: str, replacements: dict[str,
         return lines
 
     # Step 2: Deduplication
-    # We use a set of indices to mark lines for deletion
-    to_delete = set()
-
-    # Identify all chapter titles first to avoid repeated regex matching
-    # structure: list of (line_index, match_object, stripped_content, indentation_level)
-    chapter_indices = []
-    for idx, line in enumerate(lines):
-        match = get_chapter_match(line, regex_pattern)
-        if match:
-            indent = len(line) - len(line.lstrip())
-            chapter_indices.append({
-                'index': idx,
-                'content': line.strip(),
-                'indent': indent
-            })
-
-    # Compare adjacent chapter titles
-    # We iterate through the identified chapters
-    i = 0
-    while i < len(chapter_indices) - 1:
-        current_chap = chapter_indices[i]
-        next_chap = chapter_indices[i+1]
-
-        # Check if contents are identical
-        if current_chap['content'] == next_chap['content']:
-            # Duplicate found!
-            # Prefer the one with less indentation
-            if current_chap['indent'] <= next_chap['indent']:
-                # Keep current, mark next for deletion
-                to_delete.add(next_chap['index'])
-                # Effectively, we skip the 'next_chap' in the next comparison
-                # The 'current_chap' (i) will now be compared with i+2
-                # So we delete i+1 from our logical list of chapters to compare
-                del chapter_indices[i+1]
-                # i stays the same, so we compare current against the new next
-                continue
-            else:
-                # Keep next, mark current for deletion
-                to_delete.add(current_chap['index'])
-                # We move to next pair, but since current is deleted,
-                # effectively next_chap becomes the new 'current' for the next iteration
-                i += 1
-        else:
-            i += 1
+    match_chapter = get_chapter_matcher(regex_pattern).match
+    to_delete = find_duplicate_titles(
+        (idx, line) for idx, line in enumerate(lines) if match_chapter(line)
+    )
 
     # Construct new content
     cleaned_lines = [line for idx, line in enumerate(lines) if idx not in to_delete]
 
     return cleaned_lines
 
-def deduplicate_chapters(input_path: Path, regex_pattern: str, config_path: Path | None = None) -> Path:
+def _iter_corrected(f: TextIO, replacements: dict[str, str], max_memory: int | None):
+    for line in iter_bounded_lines(f, max_memory):
+        yield correct_line(line, replacements) if replacements else line
+
+def _stream_clean(
+    input_path: Path,
+    output_path: Path | str,
+    encoding: str,
+    regex_pattern: str,
+    replacements: dict[str, str],
+    max_memory: int | None,
+    compression: str | None,
+    fsync: bool
+) -> None:
+    """
+    Two-pass clean that holds one line at a time: the first pass finds the
+    duplicate title lines, the second copies everything else.
+    """
+    match_chapter = get_chapter_matcher(regex_pattern).match
+
+    with open_input(input_path, 'r', encoding=encoding) as f:
+        to_delete = find_duplicate_titles(
+            (idx, line)
+            for idx, line in enumerate(_iter_corrected(f, replacements, max_memory))
+            if match_chapter(line)
+        )
+
+    with open_input(input_path, 'r', encoding=encoding) as f, \
+         open_sink(output_path, encoding, compression, fsync, write_buffer_size(max_memory)) as out:
+        for idx, line in enumerate(_iter_corrected(f, replacements, max_memory)):
+            if idx not in to_delete:
+                out.write(line)
+
+def deduplicate_chapters(
+    input_path: Path,
+    regex_pattern: str,
+    config_path: Path | None = None,
+    max_memory: int | None = None,
+    compression: str | None = None,
+    output_path: Path | str | None = None,
+    fsync: bool = False
+) -> Path:
     """
     Remove duplicate chapters from the input file and fix common typos.
     Wrapper around clean_content that handles file IO.
 
+    Without a budget the file is cleaned in memory. With `max_memory` set
+    it is streamed in two passes, holding one line at a time: per-string
+    overhead makes the in-memory cost of a file of short lines many times its
+    size, so no byte-size estimate is safe. gzip/xz/bz2 input is decompressed
+    on the fly.
+
     Args:
         input_path: Path to the input novel file.
         regex_pattern: Regex pattern to identify chapter titles.
         config_path: Optional path to replacements config JSON.
+        max_memory: Optional memory budget in bytes.
+        compression: Optional output compression ("gzip", "xz", "bz2").
+        output_path: Output file, or "-" for stdout. Defaults to
+            `<stem>_clean<suffix>` next to the input.
+        fsync: Make the write durable before returning.
 
     Returns:
         Path to the cleaned file.
+
+    Raises:
+        MemoryBudgetError: The budget is below the minimum, or a line does
+            not fit it.
     """
+    check_budget(max_memory)
     encoding = detect_encoding(input_path)
+    named = plain_path(input_path)
+    output_path = Path(output_path) if output_path else compressed_path(
+        named.with_name(f"{named.stem}_clean{named.suffix}"), compression
+    )
+
+    if max_memory is not None:
+        _stream_clean(
+            input_path, output_path, encoding, regex_pattern,
+            load_replacements(config_path), max_memory, compression, fsync
+        )
+        return output_path
+
     lines: list[str] = []
 
-    with input_path.open('r', encoding=encoding) as f:
+    with open_input(input_path, 'r', encoding=encoding) as f:
         lines = f.readlines()
 
     if not lines:
@@ -154,11 +212,8 @@ def deduplicate_chapters(input_path: Path, regex_pattern: str, config_path: Path
     # Process
     cleaned_lines = clean_content(lines, regex_pattern, replacements)
 
-    # Save to a new file using atomic_write for safety
-    output_path = input_path.with_name(f"{input_path.stem}_clean{input_path.suffix}")
-
-    with atomic_write(output_path) as temp_path:
-        with open(temp_path, 'w', encoding=encoding) as f:
-            f.writelines(cleaned_lines)
+    # Save through an atomic, buffered sink for safety
+    with open_sink(output_path, encoding, compression, fsync, write_buffer_size(max_memory)) as f:
+        f.writelines(cleaned_lines)
 
     return output_path
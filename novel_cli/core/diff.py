@@ -0,0 +1,229 @@
+"""
+Core logic for comparing and merging two editions of a novel.
+
+Each chapter is fingerprinted by hashing its byte range, so comparing editions
+never holds more than one chapter in memory.
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import BinaryIO, Dict, List, NamedTuple, Tuple, Union
+
+from .novel import scan_chapter_offsets
+from ..utils.file import atomic_write
+from ..utils.text import DEFAULT_CHAPTER_PATTERN, detect_encoding, parse_chapter_number
+
+logger = logging.getLogger(__name__)
+
+
+class ChapterPrint(NamedTuple):
+    """
+    Fingerprint of one chapter. `key` is the parsed chapter number, or the
+    ordinal; `digest` covers the body below the title line.
+    """
+    index: int
+    key: int
+    title: str
+    offset: int
+    length: int
+    digest: str
+
+
+class Edition(NamedTuple):
+    path: Path
+    encoding: str
+    preamble: int
+    chapters: List[ChapterPrint]
+
+
+def _digest(data: bytes, encoding: str) -> str:
+    # Hash UTF-8 so editions in different encodings compare equal
+    if encoding != 'utf-8':
+        data = data.decode(encoding, errors='replace').encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def fingerprint(
+    input_path: Union[str, Path],
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN
+) -> Edition:
+    """
+    Hashes every chapter of a novel file.
+    """
+    path = Path(input_path)
+    encoding = detect_encoding(path)
+    titles, offsets, size = scan_chapter_offsets(path, encoding, regex_pattern)
+
+    chapters = []
+    with path.open('rb') as f:
+        for i, (title, offset) in enumerate(zip(titles, offsets)):
+            end = offsets[i + 1] if i + 1 < len(offsets) else size
+            f.seek(offset)
+            data = f.read(end - offset)
+            digest = _digest(data[data.find(b"\n") + 1:], encoding)
+            key = parse_chapter_number(title)
+            chapters.append(ChapterPrint(i + 1, key if key is not None else i + 1, title, offset, end - offset, digest))
+
+    return Edition(path, encoding, offsets[0] if offsets else size, chapters)
+
+
+def _same(a: ChapterPrint, b: ChapterPrint) -> bool:
+    return a.digest == b.digest and a.title == b.title
+
+
+def _by_key(chapters: List[ChapterPrint]) -> Dict[Tuple[int, int], ChapterPrint]:
+    """Keys chapters by (number, occurrence) so repeated numbers stay distinct."""
+    seen: Dict[int, int] = {}
+    keyed = {}
+    for chapter in chapters:
+        occurrence = seen.get(chapter.key, 0)
+        seen[chapter.key] = occurrence + 1
+        keyed[(chapter.key, occurrence)] = chapter
+    return keyed
+
+
+def compare(old: Edition, new: Edition) -> Dict[str, List[Dict[str, object]]]:
+    """
+    Aligns two editions by chapter number, then by hash.
+
+    Chapters present under the same number are "unchanged" or "changed" (body
+    or title differs). Of the rest, a removed chapter whose body hash reappears
+    among the added ones is reported as "moved" rather than as a removal plus
+    an addition.
+
+    Returns:
+        Dict with "added", "removed", "changed" and "moved" lists of
+        {"number", "title"} records (moved ones also carry "old_number"), plus
+        an "unchanged" count.
+    """
+    old_keyed = _by_key(old.chapters)
+    new_keyed = _by_key(new.chapters)
+
+    changed = []
+    unchanged = 0
+    for key, chapter in new_keyed.items():
+        previous = old_keyed.get(key)
+        if previous is None:
+            continue
+        if _same(previous, chapter):
+            unchanged += 1
+        else:
+            changed.append({"number": chapter.key, "title": chapter.title})
+
+    removed = [c for k, c in old_keyed.items() if k not in new_keyed]
+    added = [c for k, c in new_keyed.items() if k not in old_keyed]
+
+    moved = []
+    added_by_digest = {c.digest: c for c in added}
+    for chapter in list(removed):
+        target = added_by_digest.pop(chapter.digest, None)
+        if target is not None:
+            removed.remove(chapter)
+            added.remove(target)
+            moved.append({"number": target.key, "old_number": chapter.key, "title": target.title})
+
+    return {
+        "added": [{"number": c.key, "title": c.title} for c in added],
+        "removed": [{"number": c.key, "title": c.title} for c in removed],
+        "changed": changed,
+        "moved": moved,
+        "unchanged": unchanged,
+    }
+
+
+def diff_editions(
+    old_path: Union[str, Path],
+    new_path: Union[str, Path],
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN
+) -> Dict[str, List[Dict[str, object]]]:
+    """
+    Reports added, removed, changed and moved chapters between two editions.
+    """
+    return compare(fingerprint(old_path, regex_pattern), fingerprint(new_path, regex_pattern))
+
+
+def _read_range(src: BinaryIO, offset: int, length: int) -> bytes:
+    src.seek(offset)
+    return src.read(length)
+
+
+def merge_editions(
+    old_path: Union[str, Path],
+    new_path: Union[str, Path],
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN
+) -> Tuple[str, str]:
+    """
+    Writes the new edition with any chapters it dropped restored from the old one.
+
+    The new edition's order is kept, and each restored chapter is placed before
+    the first chapter with a higher number. The changes file lists the diff report and
+    "resynthesize": the 1-based positions in the merged file whose text differs
+    from the chapter at the same position in the old edition. Those are the
+    chapters whose `tts` audio (named by position) must be regenerated; pass the
+    file to `tts --changes`.
+
+    Returns:
+        Tuple[str, str]: (merged_file, changes_file)
+    """
+    old = fingerprint(old_path, regex_pattern)
+    new = fingerprint(new_path, regex_pattern)
+    report = compare(old, new)
+
+    new_keyed = _by_key(new.chapters)
+    new_digests = {c.digest for c in new.chapters}
+    merged: List[Tuple[Edition, ChapterPrint]] = [(new, c) for c in new.chapters]
+
+    # Chapters only the old edition has (and not moved elsewhere) go back in
+    # before the first new chapter with a higher number
+    restored = 0
+    for key, chapter in _by_key(old.chapters).items():
+        if key in new_keyed or chapter.digest in new_digests:
+            continue
+        position = next(
+            (i for i, (_, c) in enumerate(merged) if c.key > chapter.key), len(merged)
+        )
+        merged.insert(position, (old, chapter))
+        restored += 1
+
+    resynthesize = [
+        position
+        for position, (_, chapter) in enumerate(merged, 1)
+        if position > len(old.chapters) or not _same(old.chapters[position - 1], chapter)
+    ]
+
+    output_path = new.path.with_name(f"{new.path.stem}_merged{new.path.suffix}")
+    with atomic_write(output_path) as temp_path:
+        with temp_path.open('wb') as out, new.path.open('rb') as new_file, old.path.open('rb') as old_file:
+            out.write(_read_range(new_file, 0, new.preamble))
+            for position, (edition, chapter) in enumerate(merged, 1):
+                if edition is new:
+                    data = _read_range(new_file, chapter.offset, chapter.length)
+                else:
+                    data = _read_range(old_file, chapter.offset, chapter.length)
+                    if old.encoding != new.encoding:
+                        data = data.decode(old.encoding, errors='replace').encode(new.encoding, errors='replace')
+                # A final chapter without a newline must not run into the next title
+                if position < len(merged) and not data.endswith(b"\n"):
+                    data += b"\n"
+                out.write(data)
+
+    changes_path = new.path.with_name(f"{new.path.stem}_changes.json")
+    with atomic_write(changes_path) as temp_path:
+        with temp_path.open('w', encoding='utf-8') as f:
+            json.dump(dict(report, resynthesize=resynthesize), f, ensure_ascii=False, indent=2)
+
+    if restored:
+        logger.info("Restored %d chapter(s) from %s", restored, old.path)
+    return str(output_path), str(changes_path)
+
+
+def load_resynthesize(changes_path: Union[str, Path]) -> List[int]:
+    """
+    Reads the "resynthesize" positions from a changes file written by `merge_editions`.
+    """
+    with Path(changes_path).open('r', encoding='utf-8') as f:
+        changes = json.load(f)
+    if not isinstance(changes, dict) or "resynthesize" not in changes:
+        raise ValueError(f"Not a changes file: {changes_path}")
+    return [int(p) for p in changes["resynthesize"]]
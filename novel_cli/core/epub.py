@@ -0,0 +1,240 @@
+"""
+Core logic for exporting a novel as an EPUB 3 book.
+
+Chapters come from `chapter.iter_chapters` and are written into the zip one at
+a time, so memory is bounded by the largest chapter. The package document
+(OPF), the EPUB 3 navigation document and an EPUB 2 NCX for older readers are
+generated once all chapters are known; only the uncompressed `mimetype` entry
+has to come first in the archive.
+"""
+import html
+import logging
+import re
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from .chapter import iter_chapters
+from ..utils.file import atomic_write, plain_path
+from ..utils.memory import check_budget
+from ..utils.text import DEFAULT_CHAPTER_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# zlib level used for the XHTML entries; 6 is zlib's own speed/size balance
+DEFAULT_COMPRESS_LEVEL = 6
+
+# Characters XML 1.0 forbids even when escaped
+_XML_INVALID = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_CONTAINER_XML = """<?xml version="1.0" encoding="utf-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+_STYLE_CSS = """body { margin: 0 5%; line-height: 1.6; }
+h1, h2 { text-align: center; }
+p { text-indent: 2em; margin: 0.4em 0; }
+"""
+
+_XHTML_HEAD = """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="{lang}" xml:lang="{lang}">
+<head>
+<meta charset="utf-8"/>
+<title>{title}</title>
+<link rel="stylesheet" type="text/css" href="{css}"/>
+</head>
+<body>
+"""
+
+_XHTML_TAIL = "</body>\n</html>\n"
+
+
+def _escape(text: str) -> str:
+    return html.escape(_XML_INVALID.sub("", text), quote=True)
+
+
+def chapter_xhtml(title: str, content: str, language: str = "zh") -> str:
+    """
+    Renders one chapter as an XHTML content document.
+
+    The first line of `content` is the title line, as yielded by
+    `iter_chapters`; every other non-blank line becomes a paragraph.
+    """
+    parts = [_XHTML_HEAD.format(lang=language, title=_escape(title), css="../style.css")]
+    parts.append(f'<section epub:type="chapter">\n<h2>{_escape(title)}</h2>\n')
+    # Escape the body in one pass rather than line by line
+    body = _escape(content.partition("\n")[2])
+    parts.extend(f"<p>{line}</p>\n" for line in map(str.strip, body.split("\n")) if line)
+    parts.append("</section>\n")
+    parts.append(_XHTML_TAIL)
+    return "".join(parts)
+
+
+def _volumes(chapters: List[Tuple[str, str]], volume_step: int) -> List[Tuple[str, List[Tuple[str, str]]]]:
+    """
+    Groups (href, title) pairs into TOC sections with the same interval as
+    `volume.add_markers`. A `volume_step` of 0 gives one untitled section.
+    """
+    if volume_step <= 0:
+        return [("", chapters)]
+    return [
+        (f"第{i // volume_step + 1}卷", chapters[i:i + volume_step])
+        for i in range(0, len(chapters), volume_step)
+    ]
+
+
+def _nav_xhtml(book_title: str, sections, language: str) -> str:
+    parts = [_XHTML_HEAD.format(lang=language, title=_escape(book_title), css="style.css")]
+    parts.append(f'<nav epub:type="toc" id="toc">\n<h1>{_escape(book_title)}</h1>\n<ol>\n')
+    for label, chapters in sections:
+        items = "".join(
+            f'<li><a href="{href}">{_escape(title)}</a></li>\n' for href, title in chapters
+        )
+        if label:
+            parts.append(f'<li><a href="{chapters[0][0]}">{_escape(label)}</a>\n<ol>\n{items}</ol>\n</li>\n')
+        else:
+            parts.append(items)
+    parts.append("</ol>\n</nav>\n")
+    parts.append(_XHTML_TAIL)
+    return "".join(parts)
+
+
+def _toc_ncx(book_id: str, book_title: str, sections) -> str:
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">\n'
+        f'<head>\n<meta name="dtb:uid" content="{book_id}"/>\n'
+        f'<meta name="dtb:depth" content="{2 if sections and sections[0][0] else 1}"/>\n'
+        '</head>\n'
+        f'<docTitle><text>{_escape(book_title)}</text></docTitle>\n<navMap>\n'
+    ]
+    order = 0
+
+    def nav_point(label: str, href: str) -> str:
+        nonlocal order
+        order += 1
+        return (
+            f'<navPoint id="nav{order}" playOrder="{order}">'
+            f'<navLabel><text>{_escape(label)}</text></navLabel>'
+            f'<content src="{href}"/>'
+        )
+
+    for label, chapters in sections:
+        if label:
+            parts.append(nav_point(label, chapters[0][0]) + "\n")
+        for href, title in chapters:
+            parts.append(nav_point(title, href) + "</navPoint>\n")
+        if label:
+            parts.append("</navPoint>\n")
+    parts.append("</navMap>\n</ncx>\n")
+    return "".join(parts)
+
+
+def _content_opf(
+    book_id: str,
+    book_title: str,
+    author: Optional[str],
+    language: str,
+    modified: str,
+    hrefs: List[str]
+) -> str:
+    creator = f"<dc:creator>{_escape(author)}</dc:creator>\n" if author else ""
+    manifest = "".join(
+        f'<item id="ch{i}" href="{href}" media-type="application/xhtml+xml"/>\n'
+        for i, href in enumerate(hrefs, 1)
+    )
+    spine = "".join(f'<itemref idref="ch{i}"/>\n' for i in range(1, len(hrefs) + 1))
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">\n'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+        f'<dc:identifier id="book-id">{book_id}</dc:identifier>\n'
+        f'<dc:title>{_escape(book_title)}</dc:title>\n'
+        f'{creator}'
+        f'<dc:language>{_escape(language)}</dc:language>\n'
+        f'<meta property="dcterms:modified">{modified}</meta>\n'
+        '</metadata>\n<manifest>\n'
+        '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>\n'
+        '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>\n'
+        '<item id="css" href="style.css" media-type="text/css"/>\n'
+        f'{manifest}</manifest>\n'
+        f'<spine toc="ncx">\n{spine}</spine>\n'
+        '</package>\n'
+    )
+
+
+def export_epub(
+    input_path: Union[str, Path],
+    volume_step: int = 50,
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    language: str = "zh",
+    compress_level: int = DEFAULT_COMPRESS_LEVEL,
+    max_memory: Optional[int] = None
+) -> str:
+    """
+    Writes the chapters of a novel file to `<stem>.epub`.
+
+    Each chapter becomes its own XHTML document. The table of contents groups
+    chapters into volumes of `volume_step` (as `volume.add_markers` would
+    number them); 0 gives a flat list. Text before the first chapter is not
+    exported.
+
+    Args:
+        input_path: Path to the novel file.
+        volume_step: Chapters per TOC section, or 0 for none.
+        regex_pattern: Regex to identify chapter lines.
+        title: Book title; defaults to the file stem.
+        author: Optional author for the metadata.
+        language: BCP 47 language tag of the text.
+        compress_level: zlib level for the XHTML entries.
+        max_memory: Optional memory budget in bytes, passed to `iter_chapters`.
+
+    Returns:
+        Path to the EPUB file as a string.
+
+    Raises:
+        ValueError: No chapter matched `regex_pattern`.
+    """
+    check_budget(max_memory)
+    input_file = Path(input_path)
+    named = plain_path(input_file)
+    output_path = named.with_name(f"{named.stem}.epub")
+    book_title = title or named.stem
+    stat = input_file.stat()
+    book_id = f"urn:uuid:{uuid.uuid5(uuid.NAMESPACE_URL, f'{input_file.resolve()}:{stat.st_size}:{book_title}')}"
+    modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    chapters: List[Tuple[str, str]] = []
+    with atomic_write(output_path) as temp_path:
+        with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compress_level) as zf:
+            # Must be the first entry, stored, so readers can sniff the type
+            zf.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+            zf.writestr("META-INF/container.xml", _CONTAINER_XML)
+            zf.writestr("OEBPS/style.css", _STYLE_CSS)
+
+            for chapter_title, content, idx in iter_chapters(input_file, None, 0, regex_pattern, max_memory):
+                href = f"text/ch{idx:05d}.xhtml"
+                zf.writestr(f"OEBPS/{href}", chapter_xhtml(chapter_title, content, language))
+                chapters.append((href, chapter_title))
+
+            if not chapters:
+                raise ValueError(f"No chapters found in {input_file}")
+
+            sections = _volumes(chapters, volume_step)
+            zf.writestr("OEBPS/nav.xhtml", _nav_xhtml(book_title, sections, language))
+            zf.writestr("OEBPS/toc.ncx", _toc_ncx(book_id, book_title, sections))
+            zf.writestr("OEBPS/content.opf", _content_opf(
+                book_id, book_title, author, language, modified, [href for href, _ in chapters]
+            ))
+
+    logger.info("Exported %d chapters to %s", len(chapters), output_path)
+    return str(output_path)
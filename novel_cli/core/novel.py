@@ -0,0 +1,262 @@
+"""
+Random-access library API over a novel file.
+"""
+import logging
+import mmap
+import os
+import re
+import threading
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Tuple, Union, overload
+
+from ..utils.file import detect_compression
+from ..utils.text import DEFAULT_CHAPTER_PATTERN, detect_encoding, get_chapter_matcher
+
+logger = logging.getLogger(__name__)
+
+
+def _literal_needle(literals, encoding: str) -> Optional["re.Pattern[bytes]"]:
+    """Compiles the matcher's required literals as a bytes search pattern."""
+    try:
+        encoded = sorted({lit.encode(encoding) for lit in literals}, key=len, reverse=True)
+    except (UnicodeEncodeError, LookupError):
+        return None
+    return re.compile(b"|".join(re.escape(e) for e in encoded))
+
+
+def _scan_prefiltered(
+    data: mmap.mmap,
+    start: int,
+    encoding: str,
+    needle: "re.Pattern[bytes]",
+    match_chapter,
+    titles: List[str],
+    offsets: array
+) -> None:
+    """
+    Finds chapter lines by searching the raw bytes for a required literal and
+    decoding only the lines it hits. A false hit (e.g. across a GB18030
+    character boundary) is rejected by the matcher, so the result is the same
+    as decoding every line.
+    """
+    size = len(data)
+    search = needle.search
+    pos = start
+    while True:
+        hit = search(data, pos)
+        if hit is None:
+            return
+        line_start = data.rfind(b"\n", pos, hit.start()) + 1 or pos
+        line_end = data.find(b"\n", hit.end())
+        line_end = size if line_end == -1 else line_end + 1
+        line = data[line_start:line_end].decode(encoding, errors='replace')
+        if match_chapter(line):
+            offsets.append(line_start)
+            titles.append(line.strip())
+        pos = line_end
+
+
+def scan_chapter_offsets(
+    path: Union[str, Path],
+    encoding: str,
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+    start: int = 0
+) -> Tuple[List[str], array, int]:
+    """
+    Records the byte offset and title of every chapter line at or after byte `start`.
+
+    Lines are split on b"\\n", which never occurs inside a multi-byte
+    UTF-8 or GB18030 character, so offsets can be taken on raw bytes.
+    `start` must be the beginning of a line. When the pattern has required
+    literals, the file is mapped and only lines containing one are decoded.
+
+    Returns:
+        Tuple[List[str], array, int]: (titles, offsets, file_size)
+
+    Raises:
+        ValueError: The file is compressed, so byte offsets cannot be used.
+    """
+    compression = detect_compression(path)
+    if compression:
+        raise ValueError(f"{path} is {compression}-compressed; decompress it for random access")
+
+    matcher = get_chapter_matcher(regex_pattern)
+    match_chapter = matcher.match
+    titles: List[str] = []
+    offsets = array('q')
+    needle = _literal_needle(matcher.literals, encoding) if matcher.literals else None
+
+    with Path(path).open('rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if needle is not None and size > start:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                _scan_prefiltered(data, start, encoding, needle, match_chapter, titles, offsets)
+            return titles, offsets, size
+
+        offset = start
+        f.seek(start)
+        for raw in f:
+            line = raw.decode(encoding, errors='replace')
+            if match_chapter(line):
+                offsets.append(offset)
+                titles.append(line.strip())
+            offset += len(raw)
+
+    return titles, offsets, offset
+
+
+class Chapter:
+    """
+    Lightweight record of one chapter. The body is read from disk on access.
+    """
+    __slots__ = ("title", "offset", "length", "number", "_novel")
+
+    def __init__(self, novel: "Novel", title: str, offset: int, length: int, number: int):
+        self.title = title
+        self.offset = offset
+        self.length = length
+        self.number = number
+        self._novel = novel
+
+    @property
+    def text(self) -> str:
+        """
+        Full chapter text, title line included. Line endings are normalised
+        to "\n", as text-mode reads in `iter_chapters` do.
+        """
+        text = self._novel.read(self.offset, self.length)
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Chapter):
+            return NotImplemented
+        return (self._novel is other._novel and self.number == other.number)
+
+    def __hash__(self) -> int:
+        return hash((id(self._novel), self.number))
+
+    def __repr__(self) -> str:
+        return (
+            f"Chapter(number={self.number}, title={self.title!r}, "
+            f"offset={self.offset}, length={self.length})"
+        )
+
+
+class Novel(Sequence):
+    """
+    Read-only sequence of the chapters in a novel file.
+
+    The file is scanned once to build an index of chapter title offsets. Chapter
+    bodies are never held in memory; each `Chapter.text` access reads only its
+    own byte range, so memory depends on the number of chapters rather than on
+    the size of the file.
+
+    Example:
+        with Novel("novel.txt") as novel:
+            print(len(novel), novel[0].title)
+            for ch in novel[10:20]:
+                print(ch.number, len(ch.text))
+            ch = novel.find("第100章")
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+        encoding: Optional[str] = None
+    ):
+        self.path = Path(path)
+        self.encoding = encoding or detect_encoding(self.path)
+        self.regex_pattern = regex_pattern
+        self._file: Optional[BinaryIO] = self.path.open('rb')
+        self._lock = threading.Lock()
+        self._titles: List[str] = []
+        self._offsets = array('q')
+        self._size = 0
+        try:
+            self._build_index()
+        except BaseException:
+            self.close()
+            raise
+
+    def _build_index(self) -> None:
+        self._titles, self._offsets, self._size = scan_chapter_offsets(
+            self.path, self.encoding, self.regex_pattern
+        )
+        logger.debug("Indexed %d chapters in %s", len(self._offsets), self.path)
+
+    def read(self, offset: int, length: int) -> str:
+        """
+        Reads and decodes `length` bytes starting at byte `offset`.
+        """
+        if self._file is None:
+            raise ValueError("I/O operation on closed Novel")
+        with self._lock:
+            self._file.seek(offset)
+            data = self._file.read(length)
+        return data.decode(self.encoding, errors='replace')
+
+    def _chapter(self, i: int) -> Chapter:
+        offset = self._offsets[i]
+        end = self._offsets[i + 1] if i + 1 < len(self._offsets) else self._size
+        return Chapter(self, self._titles[i], offset, end - offset, i + 1)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @overload
+    def __getitem__(self, index: int) -> Chapter: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Chapter]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._chapter(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chapter index out of range")
+        return self._chapter(index)
+
+    def chapter(self, number: int) -> Chapter:
+        """
+        Returns the chapter with the given 1-based number.
+        """
+        if not 1 <= number <= len(self):
+            raise IndexError(f"No chapter number {number}")
+        return self._chapter(number - 1)
+
+    def find(self, pattern: str, start: int = 0) -> Optional[Chapter]:
+        """
+        Returns the first chapter at or after index `start` whose title contains
+        `pattern`, matching the `start_pattern` semantics of `iter_chapters`.
+        """
+        for i in range(max(start, 0), len(self._titles)):
+            if pattern in self._titles[i]:
+                return self._chapter(i)
+        return None
+
+    def titles(self) -> List[str]:
+        """
+        Returns the chapter titles in file order.
+        """
+        return list(self._titles)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "Novel":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"Novel({str(self.path)!r}, chapters={len(self)})"
@@ -0,0 +1,418 @@
+"""
+Core logic for full-text search over chapters with a persistent bigram index.
+
+The index lives in `<stem>_search/` next to the novel:
+
+    meta.json       chapter table, file signature and segment list
+    seg-NNNN.idx    one segment per build or append
+
+A segment maps each character bigram to a posting list. Bigrams are keyed as
+``ord(c1) << 32 | ord(c2)`` in a sorted fixed-width directory, so a lookup is a
+binary search over an mmap. The last character of every whitespace-separated
+token is also indexed as a bigram with `END_OF_TOKEN`, so each character
+position is the start of exactly one entry and single-character queries are a
+prefix scan. Posting lists are varint-encoded groups of
+``chapter_delta, count, offset_delta...`` where offsets are character positions
+within the chapter text.
+
+Appending chapters writes a new segment covering the previously last chapter
+(whose body may have grown) and everything after it; older segments are told to
+ignore that chapter through their `limit`.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import re
+import shutil
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from .novel import scan_chapter_offsets
+from ..utils.file import atomic_write
+from ..utils.text import DEFAULT_CHAPTER_PATTERN, detect_encoding
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+SEGMENT_MAGIC = b"NCSEG001"
+
+# Pairs with the last character of a token
+END_OF_TOKEN = "\0"
+
+# Directory entry: bigram key, postings offset, postings length
+_ENTRY = struct.Struct(">QQI")
+_HEADER = struct.Struct(">8sI")
+
+# Rebuild from scratch instead of appending once this many segments exist
+MAX_SEGMENTS = 8
+
+# Characters of context on each side of a match
+SNIPPET_RADIUS = 20
+
+_TERM_PATTERN = re.compile(r"\S+")
+
+
+class SearchHit(NamedTuple):
+    number: int
+    title: str
+    count: int
+    snippet: str
+
+
+def _put_varints(buf: bytearray, values: Iterable[int]) -> None:
+    append = buf.append
+    for value in values:
+        while value >= 0x80:
+            append((value & 0x7F) | 0x80)
+            value >>= 7
+        append(value)
+
+
+def _iter_varints(data) -> Iterable[int]:
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield value
+            value = 0
+            shift = 0
+
+
+def _key(bigram: str) -> int:
+    return (ord(bigram[0]) << 32) | ord(bigram[1])
+
+
+def _write_segment(path: Path, chapters: Iterable[Tuple[int, str]]) -> None:
+    """
+    Indexes (chapter_number, text) pairs, in increasing chapter order, into `path`.
+    """
+    postings: Dict[str, List[Any]] = {}  # bigram -> [buffer, last_chapter]
+
+    for number, text in chapters:
+        local: Dict[str, List[int]] = {}
+        for term in _TERM_PATTERN.finditer(text):
+            word = term.group()
+            base = term.start()
+            for i in range(len(word) - 1):
+                local.setdefault(word[i:i + 2], []).append(base + i)
+            local.setdefault(word[-1] + END_OF_TOKEN, []).append(base + len(word) - 1)
+
+        for bigram, positions in local.items():
+            entry = postings.get(bigram)
+            if entry is None:
+                entry = postings[bigram] = [bytearray(), 0]
+            buf = entry[0]
+            _put_varints(buf, (number - entry[1], len(positions)))
+            previous = 0
+            for pos in positions:
+                value = pos - previous
+                previous = pos
+                # Inlined varint: this loop runs once per bigram occurrence
+                while value >= 0x80:
+                    buf.append((value & 0x7F) | 0x80)
+                    value >>= 7
+                buf.append(value)
+            entry[1] = number
+
+    keys = sorted((_key(bigram), bigram) for bigram in postings)
+    with atomic_write(path) as temp_path:
+        with temp_path.open('wb') as f:
+            f.write(_HEADER.pack(SEGMENT_MAGIC, len(keys)))
+            offset = 0
+            for key, bigram in keys:
+                length = len(postings[bigram][0])
+                f.write(_ENTRY.pack(key, offset, length))
+                offset += length
+            for _, bigram in keys:
+                f.write(postings[bigram][0])
+
+
+class _Segment:
+    """Read-only view of one segment file."""
+
+    def __init__(self, path: Path, limit: int):
+        self.limit = limit
+        with path.open('rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = _HEADER.unpack_from(self._map, 0)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"Not a search segment: {path}")
+        self._postings_base = _HEADER.size + self._count * _ENTRY.size
+
+    def _entry(self, i: int) -> Tuple[int, int, int]:
+        return _ENTRY.unpack_from(self._map, _HEADER.size + i * _ENTRY.size)
+
+    def _lower_bound(self, key: int) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _decode(self, offset: int, length: int, postings: Dict[int, List[int]]) -> None:
+        start = self._postings_base + offset
+        values = _iter_varints(self._map[start:start + length])
+        chapter = 0
+        for delta in values:
+            chapter += delta
+            count = next(values)
+            positions = []
+            pos = 0
+            for _ in range(count):
+                pos += next(values)
+                positions.append(pos)
+            if chapter < self.limit:
+                postings.setdefault(chapter, []).extend(positions)
+
+    def lookup(self, key: int, postings: Dict[int, List[int]]) -> None:
+        """Adds the postings of bigram `key` to `postings` (chapter -> positions)."""
+        i = self._lower_bound(key)
+        if i < self._count:
+            entry_key, offset, length = self._entry(i)
+            if entry_key == key:
+                self._decode(offset, length, postings)
+
+    def lookup_prefix(self, char: str, postings: Dict[int, List[int]]) -> None:
+        """
+        Adds the postings of every bigram starting with `char`, i.e. of every
+        occurrence of `char`, including those ending a token.
+        """
+        i = self._lower_bound(ord(char) << 32)
+        end = (ord(char) + 1) << 32
+        while i < self._count:
+            entry_key, offset, length = self._entry(i)
+            if entry_key >= end:
+                break
+            self._decode(offset, length, postings)
+            i += 1
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def _index_dir(input_file: Path) -> Path:
+    return input_file.parent / f"{input_file.stem}_search"
+
+
+def _prefix_hash(path: Path, length: int) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with path.open('rb') as f:
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _iter_texts(path: Path, encoding: str, chapters: List[List[Any]], first: int) -> Iterable[Tuple[int, str]]:
+    """Yields (number, text) for chapters[first - 1:] read from their byte ranges."""
+    with path.open('rb') as f:
+        for number in range(first, len(chapters) + 1):
+            _, offset, length = chapters[number - 1]
+            f.seek(offset)
+            yield number, f.read(length).decode(encoding, errors='replace')
+
+
+def _write_meta(index_dir: Path, meta: Dict[str, Any]) -> None:
+    with atomic_write(index_dir / "meta.json") as temp_path:
+        with temp_path.open('w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+
+def _chapter_table(titles: List[str], offsets, size: int) -> List[List[Any]]:
+    ends = list(offsets[1:]) + [size]
+    return [[title, offset, end - offset] for title, offset, end in zip(titles, offsets, ends)]
+
+
+def build_index(
+    input_path: Union[str, Path],
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN
+) -> str:
+    """
+    Builds the search index for a novel from scratch.
+
+    Returns:
+        Path to the index directory as a string.
+    """
+    input_file = Path(input_path)
+    index_dir = _index_dir(input_file)
+    if index_dir.exists():
+        shutil.rmtree(index_dir)
+    index_dir.mkdir()
+
+    encoding = detect_encoding(input_file)
+    titles, offsets, size = scan_chapter_offsets(input_file, encoding, regex_pattern)
+    chapters = _chapter_table(titles, offsets, size)
+
+    _write_segment(index_dir / "seg-0000.idx", _iter_texts(input_file, encoding, chapters, 1))
+
+    last_offset = chapters[-1][1] if chapters else 0
+    stat = input_file.stat()
+    _write_meta(index_dir, {
+        "version": INDEX_VERSION,
+        "regex": regex_pattern,
+        "encoding": encoding,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "prefix_hash": _prefix_hash(input_file, last_offset),
+        "chapters": chapters,
+        "segments": [{"file": "seg-0000.idx", "limit": len(chapters) + 1}],
+    })
+    return str(index_dir)
+
+
+def _append(input_file: Path, index_dir: Path, meta: Dict[str, Any]) -> None:
+    """Indexes chapters appended since the last build as a new segment."""
+    chapters = meta["chapters"]
+    first = max(len(chapters), 1)
+    start = chapters[-1][1] if chapters else 0
+
+    titles, offsets, size = scan_chapter_offsets(input_file, meta["encoding"], meta["regex"], start)
+    chapters[first - 1:] = _chapter_table(titles, offsets, size)
+
+    name = f"seg-{len(meta['segments']):04d}.idx"
+    _write_segment(index_dir / name, _iter_texts(input_file, meta["encoding"], chapters, first))
+
+    for segment in meta["segments"]:
+        segment["limit"] = min(segment["limit"], first)
+    meta["segments"].append({"file": name, "limit": len(chapters) + 1})
+
+    stat = input_file.stat()
+    meta["size"] = stat.st_size
+    meta["mtime_ns"] = stat.st_mtime_ns
+    meta["prefix_hash"] = _prefix_hash(input_file, chapters[-1][1] if chapters else 0)
+    _write_meta(index_dir, meta)
+
+
+def update_index(
+    input_path: Union[str, Path],
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN
+) -> str:
+    """
+    Brings the index up to date with the novel file.
+
+    Nothing is done if the file is unchanged. If it only grew and everything
+    before the last indexed chapter is byte-identical, the new text is indexed
+    as an extra segment; otherwise the index is rebuilt.
+
+    Returns:
+        Path to the index directory as a string.
+    """
+    input_file = Path(input_path)
+    index_dir = _index_dir(input_file)
+    meta_path = index_dir / "meta.json"
+
+    try:
+        with meta_path.open('r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return build_index(input_file, regex_pattern)
+
+    if meta.get("version") != INDEX_VERSION or meta.get("regex") != regex_pattern:
+        return build_index(input_file, regex_pattern)
+
+    stat = input_file.stat()
+    if stat.st_size == meta["size"] and stat.st_mtime_ns == meta["mtime_ns"]:
+        return str(index_dir)
+
+    chapters = meta["chapters"]
+    last_offset = chapters[-1][1] if chapters else 0
+    if (
+        stat.st_size > meta["size"]
+        and len(meta["segments"]) < MAX_SEGMENTS
+        and _prefix_hash(input_file, last_offset) == meta["prefix_hash"]
+    ):
+        logger.info("Appending to search index: %s", index_dir)
+        _append(input_file, index_dir, meta)
+        return str(index_dir)
+
+    return build_index(input_file, regex_pattern)
+
+
+def _match_positions(segments: List[_Segment], term: str) -> Dict[int, List[int]]:
+    """Returns chapter -> start positions of `term` in the chapter text."""
+    if len(term) == 1:
+        postings: Dict[int, List[int]] = {}
+        for segment in segments:
+            segment.lookup_prefix(term, postings)
+        return {ch: sorted(set(pos)) for ch, pos in postings.items()}
+
+    # Candidates come from the first bigram; every later bigram must follow at its offset
+    matches: Optional[Dict[int, set]] = None
+    for k in range(len(term) - 1):
+        postings = {}
+        key = _key(term[k:k + 2])
+        for segment in segments:
+            segment.lookup(key, postings)
+        if matches is None:
+            matches = {ch: set(pos) for ch, pos in postings.items()}
+        else:
+            matches = {
+                ch: starts & {p - k for p in postings[ch]}
+                for ch, starts in matches.items() if ch in postings
+            }
+            matches = {ch: starts for ch, starts in matches.items() if starts}
+        if not matches:
+            return {}
+    return {ch: sorted(starts) for ch, starts in (matches or {}).items()}
+
+
+def search(
+    input_path: Union[str, Path],
+    query: str,
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+    limit: int = 20
+) -> List[SearchHit]:
+    """
+    Finds chapters containing every whitespace-separated term of `query`.
+
+    The index is created or updated first if the novel changed.
+
+    Returns:
+        Hits in chapter order with the number of matches of the first term and a
+        snippet around its first occurrence. At most `limit` hits (0 for all).
+    """
+    input_file = Path(input_path)
+    index_dir = Path(update_index(input_file, regex_pattern))
+    with (index_dir / "meta.json").open('r', encoding='utf-8') as f:
+        meta = json.load(f)
+
+    terms = _TERM_PATTERN.findall(query)
+    if not terms:
+        return []
+
+    segments = [_Segment(index_dir / s["file"], s["limit"]) for s in meta["segments"]]
+    try:
+        per_term = [_match_positions(segments, term) for term in terms]
+    finally:
+        for segment in segments:
+            segment.close()
+
+    numbers = sorted(set.intersection(*(set(m) for m in per_term)))
+    if limit > 0:
+        numbers = numbers[:limit]
+
+    hits = []
+    chapters = meta["chapters"]
+    with input_file.open('rb') as f:
+        for number in numbers:
+            title, offset, length = chapters[number - 1]
+            f.seek(offset)
+            text = f.read(length).decode(meta["encoding"], errors='replace')
+            pos = per_term[0][number][0]
+            start = max(pos - SNIPPET_RADIUS, 0)
+            snippet = text[start:pos + len(terms[0]) + SNIPPET_RADIUS]
+            snippet = " ".join(snippet.split())
+            hits.append(SearchHit(number, title, len(per_term[0][number]), snippet))
+    return hits
@@ -0,0 +1,416 @@
+"""
+Resident daemon answering chapter queries over a local socket.
+
+Requests and responses are JSON objects. Over a Unix socket each message is one
+line; over HTTP each request is a POST whose body is the JSON object.
+
+Operations:
+    {"op": "ping"}
+    {"op": "chapters", "file": PATH}
+        -> {"chapters": [{"number", "title", "offset", "length"}, ...]}
+    {"op": "range", "file": PATH, "start": TITLE_SUBSTRING | "number": N, "count": N}
+        -> {"chapters": [{"number", "title", "text"}, ...]}
+    {"op": "tts", "file": PATH, "start": ..., "count": N}
+        -> {"job": ID}
+    {"op": "job", "id": ID}
+        -> {"job": {"status", "completed", "failed", "output"}}
+
+Every request may carry "regex" to override the chapter pattern. Responses
+carry "ok": true, or "ok": false with an "error" message.
+
+Only files under the served root directory can be opened; relative paths are
+taken from the root. The TTS server is fixed when the daemon starts. HTTP
+requests must be sent with `Content-Type: application/json` and a loopback
+`Host`, which browsers only allow for same-origin pages, so web sites cannot
+reach the daemon through simple cross-site requests or DNS rebinding.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, Optional, Tuple
+
+from . import atts
+from .novel import Novel
+from ..config import DEFAULT_REF_AUDIO, DEFAULT_TTS_API
+from ..utils.text import DEFAULT_CHAPTER_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# Number of novel indexes kept in memory
+DEFAULT_CACHE_SIZE = 16
+
+# Largest accepted HTTP request body
+MAX_REQUEST_BYTES = 1024 * 1024
+
+# Host header names accepted over HTTP (with any port)
+LOOPBACK_HOSTS = frozenset({"localhost", "127.0.0.1", "::1"})
+
+
+class _CacheEntry:
+    """A cached `Novel` with the number of requests currently reading it."""
+    __slots__ = ("signature", "novel", "users", "evicted")
+
+    def __init__(self, signature: Tuple[int, int], novel: Novel):
+        self.signature = signature
+        self.novel = novel
+        self.users = 0
+        self.evicted = False
+
+
+class NovelCache:
+    """
+    LRU cache of `Novel` indexes, invalidated when the file's mtime or size changes.
+
+    Novels are borrowed for the duration of a request. An entry evicted while
+    borrowed is closed by its last user, so no handler sees it closed mid-read.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CACHE_SIZE):
+        self.capacity = max(1, capacity)
+        self._entries: "OrderedDict[Tuple[str, str], _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def borrow(self, path: Path, regex_pattern: str = DEFAULT_CHAPTER_PATTERN) -> Iterator[Novel]:
+        entry = self._acquire(path, regex_pattern)
+        try:
+            yield entry.novel
+        finally:
+            with self._lock:
+                entry.users -= 1
+                if entry.evicted and entry.users == 0:
+                    entry.novel.close()
+
+    def _acquire(self, path: Path, regex_pattern: str) -> _CacheEntry:
+        resolved = Path(path).resolve()
+        stat = resolved.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (str(resolved), regex_pattern)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(key)
+                entry.users += 1
+                return entry
+
+        # Index outside the lock so other novels stay servable meanwhile
+        entry = _CacheEntry(signature, Novel(resolved, regex_pattern))
+        entry.users = 1
+
+        with self._lock:
+            stale = self._entries.pop(key, None)
+            if stale is not None:
+                self._evict(stale)
+            self._entries[key] = entry
+            while len(self._entries) > self.capacity:
+                _, evicted = self._entries.popitem(last=False)
+                self._evict(evicted)
+        return entry
+
+    @staticmethod
+    def _evict(entry: _CacheEntry) -> None:
+        """Closes an entry now, or marks it for its last user to close. Needs the lock."""
+        entry.evicted = True
+        if entry.users == 0:
+            entry.novel.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for entry in self._entries.values():
+                self._evict(entry)
+            self._entries.clear()
+
+
+class NovelService:
+    """
+    Dispatches JSON requests against cached novel indexes and TTS jobs.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        root: Optional[Path] = None,
+        api_url: str = DEFAULT_TTS_API,
+        ref_audio_path: str = DEFAULT_REF_AUDIO
+    ):
+        self.cache = NovelCache(cache_size)
+        self.root = Path(root or Path.cwd()).resolve()
+        self.api_url = api_url
+        self.ref_audio_path = ref_audio_path
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._job_ids = itertools.count(1)
+        self._tasks: set = set()
+
+    def _path(self, request: Dict[str, Any]) -> Path:
+        """
+        Resolves the request's "file" against the root, refusing anything outside it.
+        """
+        if "file" not in request:
+            raise ValueError("Missing 'file'")
+        path = (self.root / request["file"]).resolve()
+        if not path.is_relative_to(self.root):
+            raise PermissionError(f"File is outside the served root: {request['file']}")
+        return path
+
+    def _novel(self, request: Dict[str, Any]) -> ContextManager[Novel]:
+        return self.cache.borrow(self._path(request), request.get("regex") or DEFAULT_CHAPTER_PATTERN)
+
+    def chapters(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        with self._novel(request) as novel:
+            return {"chapters": [
+                {"number": c.number, "title": c.title, "offset": c.offset, "length": c.length}
+                for c in novel
+            ]}
+
+    def chapter_range(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        with self._novel(request) as novel:
+            return self._range(novel, request)
+
+    def _range(self, novel: Novel, request: Dict[str, Any]) -> Dict[str, Any]:
+        count = int(request.get("count", 1))
+        if count < 0:
+            raise ValueError(f"Invalid count: {count}")
+
+        if request.get("number") is not None:
+            number = int(request["number"])
+            if not 1 <= number <= len(novel):
+                raise LookupError(f"No chapter number {number}")
+            first = number - 1
+        elif request.get("start"):
+            found = novel.find(request["start"])
+            if found is None:
+                raise LookupError("Start chapter not found")
+            first = found.number - 1
+        else:
+            first = 0
+
+        stop = len(novel) if count <= 0 else first + count
+        return {"chapters": [
+            {"number": c.number, "title": c.title, "text": c.text}
+            for c in novel[first:stop]
+        ]}
+
+    def enqueue_tts(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Starts a TTS job on the running event loop and returns its id.
+        """
+        input_path = self._path(request)
+        job_id = str(next(self._job_ids))
+        job = {"status": "running", "completed": 0, "failed": 0, "output": None}
+        self.jobs[job_id] = job
+
+        def on_progress(event: atts.TTSEvent) -> None:
+            job["failed" if event.status == "failed" else "completed"] += 1
+
+        async def run() -> None:
+            try:
+                job["output"] = await atts.aprocess_tts(
+                    input_path=input_path,
+                    start_pattern=request.get("start"),
+                    count=int(request.get("count", 1)),
+                    api_url=self.api_url,
+                    ref_audio_path=self.ref_audio_path,
+                    regex_pattern=request.get("regex") or DEFAULT_CHAPTER_PATTERN,
+                    concurrency=request.get("concurrency"),
+                    on_progress=on_progress
+                )
+                job["status"] = "done"
+            except asyncio.CancelledError:
+                job["status"] = "cancelled"
+                raise
+            except Exception as e:
+                logger.error(f"TTS job {job_id} failed: {e}")
+                job["status"] = "failed"
+                job["error"] = str(e)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return {"job": job_id}
+
+    def job(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        job = self.jobs.get(str(request.get("id")))
+        if job is None:
+            raise LookupError(f"Unknown job: {request.get('id')}")
+        return {"job": job}
+
+    async def handle(self, request: Any) -> Dict[str, Any]:
+        """
+        Answers one request. Errors are reported in the response, never raised.
+        """
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            op = request.get("op")
+            if op == "ping":
+                result: Dict[str, Any] = {}
+            elif op == "chapters":
+                result = await asyncio.to_thread(self.chapters, request)
+            elif op == "range":
+                result = await asyncio.to_thread(self.chapter_range, request)
+            elif op == "tts":
+                result = self.enqueue_tts(request)
+            elif op == "job":
+                result = self.job(request)
+            else:
+                raise ValueError(f"Unknown op: {op}")
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": True, **result}
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.cache.close()
+
+
+async def _answer(service: NovelService, data: bytes) -> bytes:
+    try:
+        request = json.loads(data)
+    except ValueError as e:
+        response: Dict[str, Any] = {"ok": False, "error": f"Invalid JSON: {e}"}
+    else:
+        response = await service.handle(request)
+    return json.dumps(response, ensure_ascii=False).encode('utf-8')
+
+
+async def _serve_lines(
+    service: NovelService,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter
+) -> None:
+    """One JSON request per line, one JSON response per line."""
+    try:
+        while line := await reader.readline():
+            if line.strip():
+                writer.write(await _answer(service, line) + b"\n")
+                await writer.drain()
+    except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+        logger.debug("Connection closed: %s", e)
+    finally:
+        writer.close()
+
+
+def _is_loopback_host(host: str) -> bool:
+    """Checks a Host header value such as "localhost:8765" or "[::1]:8765"."""
+    if host.startswith("["):
+        name = host[1:].partition("]")[0]
+    else:
+        name = host.rpartition(":")[0] if ":" in host else host
+    return name.lower() in LOOPBACK_HOSTS
+
+
+def _rejection(method: bytes, headers: Dict[str, str], length: int) -> Optional[str]:
+    """Returns the HTTP status for a request that must not be served, else None."""
+    if method != b"POST":
+        return "405 Method Not Allowed"
+    if not _is_loopback_host(headers.get("host", "")):
+        return "403 Forbidden"
+    if headers.get("content-type", "").partition(";")[0].strip().lower() != "application/json":
+        return "415 Unsupported Media Type"
+    if length > MAX_REQUEST_BYTES:
+        return "413 Payload Too Large"
+    return None
+
+
+async def _serve_http(
+    service: NovelService,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter
+) -> None:
+    """
+    HTTP/1.1 with keep-alive; every request is a POST carrying a JSON body.
+
+    Requests without a JSON content type or a loopback Host are refused, and
+    the connection is closed.
+    """
+    try:
+        while request_line := await reader.readline():
+            method = request_line.split(b" ", 1)[0]
+            headers: Dict[str, str] = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode('latin-1').partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            rejected = _rejection(method, headers, length)
+            if rejected is not None:
+                status = rejected
+                body = json.dumps({"ok": False, "error": status}).encode('utf-8')
+                keep_alive = False
+            else:
+                body = await _answer(service, await reader.readexactly(length))
+                status = "200 OK"
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+                + body
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+        logger.debug("Connection closed: %s", e)
+    finally:
+        writer.close()
+
+
+async def serve(
+    socket_path: Optional[Path] = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    ready: Optional[asyncio.Future] = None,
+    root: Optional[Path] = None,
+    api_url: str = DEFAULT_TTS_API,
+    ref_audio_path: str = DEFAULT_REF_AUDIO
+) -> None:
+    """
+    Serves requests until cancelled.
+
+    Listens on the Unix socket `socket_path` if given, otherwise on HTTP at
+    `host:port`. `ready`, if given, is resolved with the bound address.
+    Requests may only open files under `root` (default: the current
+    directory); TTS jobs use `api_url` and `ref_audio_path`.
+    """
+    service = NovelService(cache_size, root, api_url, ref_audio_path)
+
+    if socket_path is not None:
+        socket_path = Path(socket_path)
+        # Only replace a stale socket, never a file given by mistake
+        if socket_path.is_socket():
+            socket_path.unlink()
+        elif socket_path.exists():
+            raise FileExistsError(f"Not a socket: {socket_path}")
+        server = await asyncio.start_unix_server(
+            lambda r, w: _serve_lines(service, r, w), path=str(socket_path)
+        )
+        address: Any = str(socket_path)
+    else:
+        server = await asyncio.start_server(
+            lambda r, w: _serve_http(service, r, w), host, port
+        )
+        address = server.sockets[0].getsockname()[:2]
+
+    logger.info("Serving on %s", address)
+    if ready is not None:
+        ready.set_result(address)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+        if socket_path is not None and socket_path.is_socket():
+            socket_path.unlink()
@@ -0,0 +1,239 @@
+"""
+Core logic for per-chapter statistics of a novel file.
+
+One scan of the file fills compact `array` columns (byte offset, byte length,
+character count and parsed chapter number per chapter). Summaries, percentiles
+and numbering checks are then computed from the columns alone.
+"""
+import logging
+import mmap
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple, Union
+
+from .novel import scan_chapter_offsets
+from ..utils.text import DEFAULT_CHAPTER_PATTERN, detect_encoding, parse_chapter_number
+
+logger = logging.getLogger(__name__)
+
+# Typical Mandarin TTS speaking rate, used to estimate audio duration
+DEFAULT_CHARS_PER_SECOND = 4.5
+
+# Stored in the number column for titles without a chapter number
+NO_NUMBER = -1
+
+# Percentiles reported for character counts and durations
+PERCENTILES = (50, 90, 99)
+
+# Entries listed per section in the text report
+REPORT_LIMIT = 20
+
+# Not counted as characters: they are not spoken
+_WHITESPACE = (" ", "　", "\t", "\r", "\n")
+
+
+class ChapterStats(NamedTuple):
+    """
+    Column store of per-chapter metrics; row i describes chapter i + 1.
+    """
+    path: Path
+    titles: List[str]
+    offsets: array
+    lengths: array
+    chars: array
+    numbers: array
+
+
+def collect_stats(
+    input_path: Union[str, Path],
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN
+) -> ChapterStats:
+    """
+    Scans a novel file once and returns its per-chapter columns.
+
+    Character counts exclude whitespace and include the title line.
+    """
+    path = Path(input_path)
+    encoding = detect_encoding(path)
+    titles, offsets, size = scan_chapter_offsets(path, encoding, regex_pattern)
+
+    lengths = array('q')
+    chars = array('q')
+    numbers = array('q')
+    for title in titles:
+        number = parse_chapter_number(title)
+        numbers.append(NO_NUMBER if number is None else number)
+
+    if offsets:
+        with path.open('rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            ends = offsets[1:] + array('q', [size])
+            for start, end in zip(offsets, ends):
+                text = data[start:end].decode(encoding, errors='replace')
+                lengths.append(end - start)
+                chars.append(len(text) - sum(text.count(ws) for ws in _WHITESPACE))
+
+    return ChapterStats(path, titles, offsets, lengths, chars, numbers)
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """
+    Returns the q-th percentile (0-100) of pre-sorted values, interpolating
+    linearly between the closest ranks.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def _distribution(values: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    summary = {"min": float(ordered[0]) if ordered else 0.0}
+    for q in PERCENTILES:
+        summary[f"p{q}"] = percentile(ordered, q)
+    summary["max"] = float(ordered[-1]) if ordered else 0.0
+    summary["mean"] = sum(ordered) / len(ordered) if ordered else 0.0
+    return summary
+
+
+def _missing_ranges(numbers: Sequence[int]) -> List[Tuple[int, int]]:
+    """Returns the (first, last) runs of numbers absent between the lowest and highest."""
+    present = sorted(set(numbers))
+    return [(a + 1, b - 1) for a, b in zip(present, present[1:]) if b - a > 1]
+
+
+def numbering_issues(stats: ChapterStats) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Checks the parsed chapter numbers in file order.
+
+    Returns:
+        Dict with "missing" ({"first", "last"} runs of absent numbers),
+        "repeated" ({"number", "count"}) and "out_of_order" (chapters whose
+        number is lower than one seen before them: {"index", "title",
+        "number", "after"}).
+    """
+    numbered = [n for n in stats.numbers if n != NO_NUMBER]
+    out_of_order = []
+    highest = NO_NUMBER
+    for i, number in enumerate(stats.numbers):
+        if number == NO_NUMBER:
+            continue
+        if number < highest:
+            out_of_order.append({"index": i + 1, "title": stats.titles[i], "number": number, "after": highest})
+        highest = max(highest, number)
+
+    return {
+        "missing": [{"first": a, "last": b} for a, b in _missing_ranges(numbered)],
+        "repeated": [
+            {"number": n, "count": c} for n, c in sorted(Counter(numbered).items()) if c > 1
+        ],
+        "out_of_order": out_of_order,
+    }
+
+
+def summarize(
+    stats: ChapterStats,
+    chars_per_second: float = DEFAULT_CHARS_PER_SECOND,
+    per_chapter: bool = False
+) -> Dict[str, Any]:
+    """
+    Builds the report for `stats`: totals, character and duration
+    percentiles, duplicate titles and numbering issues. With `per_chapter`,
+    one row per chapter is included as well.
+    """
+    if chars_per_second <= 0:
+        raise ValueError("chars_per_second must be positive")
+
+    seconds = [c / chars_per_second for c in stats.chars]
+    summary: Dict[str, Any] = {
+        "file": str(stats.path),
+        "chapters": len(stats.titles),
+        "characters": sum(stats.chars),
+        "bytes": sum(stats.lengths),
+        "chars_per_second": chars_per_second,
+        "duration_seconds": sum(seconds),
+        "chars": _distribution(stats.chars),
+        "seconds": _distribution(seconds),
+        "duplicate_titles": [
+            {"title": t, "count": c} for t, c in Counter(stats.titles).most_common() if c > 1
+        ],
+        "numbering": numbering_issues(stats),
+    }
+    if per_chapter:
+        summary["per_chapter"] = [
+            {
+                "index": i + 1,
+                "title": stats.titles[i],
+                "number": None if stats.numbers[i] == NO_NUMBER else stats.numbers[i],
+                "offset": stats.offsets[i],
+                "bytes": stats.lengths[i],
+                "chars": stats.chars[i],
+                "seconds": seconds[i],
+            }
+            for i in range(len(stats.titles))
+        ]
+    return summary
+
+
+def _hms(seconds: float) -> str:
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+def _limited(lines: List[str]) -> List[str]:
+    if len(lines) > REPORT_LIMIT:
+        return lines[:REPORT_LIMIT] + [f"  ... and {len(lines) - REPORT_LIMIT} more"]
+    return lines
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """
+    Renders a `summarize` result as a plain-text report.
+    """
+    columns = ["min"] + [f"p{q}" for q in PERCENTILES] + ["max", "mean"]
+    lines = [
+        f"Chapters:       {summary['chapters']:,}",
+        f"Characters:     {summary['characters']:,}",
+        f"Est. duration:  {_hms(summary['duration_seconds'])} "
+        f"at {summary['chars_per_second']:g} chars/s",
+        "",
+        f"{'':12}" + "".join(f"{c:>10}" for c in columns),
+        f"{'characters':12}" + "".join(f"{summary['chars'][c]:>10,.0f}" for c in columns),
+        f"{'minutes':12}" + "".join(f"{summary['seconds'][c] / 60:>10.1f}" for c in columns),
+    ]
+
+    duplicates = summary["duplicate_titles"]
+    if duplicates:
+        lines += ["", f"Duplicate titles ({len(duplicates)}):"]
+        lines += _limited([f"  x{d['count']}  {d['title']}" for d in duplicates])
+
+    numbering = summary["numbering"]
+    if numbering["missing"]:
+        runs = [
+            str(r["first"]) if r["first"] == r["last"] else f"{r['first']}-{r['last']}"
+            for r in numbering["missing"]
+        ]
+        lines += ["", f"Missing numbers ({len(runs)} runs):"]
+        lines += _limited([f"  {run}" for run in runs])
+    if numbering["repeated"]:
+        lines += ["", f"Repeated numbers ({len(numbering['repeated'])}):"]
+        lines += _limited([f"  {r['number']} x{r['count']}" for r in numbering["repeated"]])
+    if numbering["out_of_order"]:
+        lines += ["", f"Out of order ({len(numbering['out_of_order'])}):"]
+        lines += _limited([
+            f"  #{o['index']} {o['title']} (after {o['after']})" for o in numbering["out_of_order"]
+        ])
+
+    if "per_chapter" in summary:
+        lines += ["", f"{'#':>6} {'number':>7} {'chars':>8} {'minutes':>8}  title"]
+        for row in summary["per_chapter"]:
+            number = "" if row["number"] is None else row["number"]
+            lines.append(
+                f"{row['index']:>6} {number:>7} {row['chars']:>8} {row['seconds'] / 60:>8.1f}  {row['title']}"
+            )
+
+    return "\n".join(lines)
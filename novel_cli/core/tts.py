@@ -1,14 +1,21 @@
 import json
 import shutil
 import logging
+import sys
 import urllib.request
 import urllib.error
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 from socket import timeout as SocketTimeout
 from pathlib import Path
-from typing import Optional, Union, Dict, Any, List
+from typing import BinaryIO, Generator, Iterable, Optional, Set, Union, Dict, Any, List, Tuple
 
 from .chapter import iter_chapters
+from ..config import DEFAULT_TTS_PROFILE
+from ..utils.file import atomic_write
 from ..utils.text import DEFAULT_CHAPTER_PATTERN, sanitize_filename
 
 logger = logging.getLogger(__name__)
@@ -17,29 +24,140 @@ logger = logging.getLogger(__name__)
 DEFAULT_TIMEOUT = 1200
 MAX_RETRIES = 3
 
+# Bytes read from the HTTP response per chunk when streaming audio
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Server-side parameters sent with every request unless a profile overrides them
+DEFAULT_TTS_PARAMS: Dict[str, Any] = {
+    "text_lang": "zh",
+    "prompt_lang": "zh",
+    "prompt_text": "",
+    "text_split_method": "cut3",
+    "batch_size": 8,
+    "seed": 0,
+    "media_type": "aac",
+    "streaming_mode": True
+}
+
+# Profile keys that map onto request parameters (the rest are client settings)
+PROFILE_PAYLOAD_KEYS = ("batch_size", "text_split_method")
+
+# Number of upcoming chapters synthesized in the background in listen-ahead mode
+DEFAULT_PREFETCH = 2
+
+
+def chapter_audio_path(output_dir: Path, idx: int, title: str, ext: str) -> Path:
+    """
+    Returns the output path of a chapter's audio file, e.g. ``0001_第1章.aac``.
+    """
+    return output_dir / f"{str(idx).zfill(4)}_{sanitize_filename(title)}.{ext}"
+
+
+def load_profile(api_url: str, profile_path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Loads the tuned profile for `api_url`, or an empty dict if there is none.
+
+    Profiles are stored as a JSON object keyed by API endpoint, since the best
+    settings depend on the GPU and model behind each server.
+    """
+    path = Path(profile_path or DEFAULT_TTS_PROFILE)
+    if not path.exists():
+        return {}
+    try:
+        with path.open('r', encoding='utf-8') as f:
+            profiles = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable TTS profile {path}: {e}")
+        return {}
+    profile = profiles.get(api_url) if isinstance(profiles, dict) else None
+    return profile if isinstance(profile, dict) else {}
+
+
+def save_profile(api_url: str, profile: Dict[str, Any], profile_path: Optional[Path] = None) -> Path:
+    """
+    Stores `profile` for `api_url`, keeping the profiles of other endpoints.
+
+    Returns:
+        Path to the profile file.
+    """
+    path = Path(profile_path or DEFAULT_TTS_PROFILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    profiles: Dict[str, Any] = {}
+    if path.exists():
+        try:
+            with path.open('r', encoding='utf-8') as f:
+                profiles = json.load(f)
+        except (OSError, ValueError):
+            profiles = {}
+        if not isinstance(profiles, dict):
+            profiles = {}
+    profiles[api_url] = profile
+
+    with atomic_write(path) as temp_path:
+        with temp_path.open('w', encoding='utf-8') as f:
+            json.dump(profiles, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def build_payload_template(ref_audio_path: str, profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Returns the request payload for `ref_audio_path` with profile overrides applied.
+    """
+    payload_template = dict(DEFAULT_TTS_PARAMS, ref_audio_path=ref_audio_path)
+    for key in PROFILE_PAYLOAD_KEYS:
+        if profile and key in profile:
+            payload_template[key] = profile[key]
+    return payload_template
+
+
+@contextmanager
+def _open_sink(target: Union[str, Path]) -> Generator[BinaryIO, None, None]:
+    """
+    Opens the listen-ahead output: ``-`` for stdout, otherwise a file or named pipe.
+
+    Opening a named pipe blocks until a player opens the other end.
+    """
+    if str(target) == "-":
+        yield sys.stdout.buffer
+        return
+    with open(target, 'wb') as sink:
+        yield sink
+
+
 def _tts_worker(
     text: str,
     title: str,
     idx: int,
     output_dir: Path,
     api_url: str,
-    payload_template: Dict[str, Any]
+    payload_template: Dict[str, Any],
+    sink: Optional[BinaryIO] = None
 ) -> bool:
     """
     Worker function to process a single chapter.
+
+    The response body is written to disk chunk by chunk as it arrives. If `sink`
+    is given, every chunk is also forwarded to it, so playback can start before
+    the server has finished the chapter. Chapters already on disk are replayed
+    into the sink instead of being synthesized again.
     """
-    safe_title = sanitize_filename(title)
     ext = payload_template.get("media_type", "wav")
-    file_name = output_dir / f"{str(idx).zfill(4)}_{safe_title}.{ext}"
+    file_name = chapter_audio_path(output_dir, idx, title, ext)
     
     if file_name.exists():
         logger.info(f"Skipping existing: {title}")
+        if sink is not None:
+            with file_name.open('rb') as f:
+                shutil.copyfileobj(f, sink, STREAM_CHUNK_SIZE)
+            sink.flush()
         return True
 
     payload = payload_template.copy()
     payload["text"] = text
 
     data = json.dumps(payload).encode('utf-8')
+    streamed = False
     
     for attempt in range(MAX_RETRIES):
         try:
@@ -51,8 +169,14 @@ def _tts_worker(
 
             with urllib.request.urlopen(req, timeout=DEFAULT_TIMEOUT) as response:
                 if response.status == 200:
-                    with file_name.open('wb') as f:
-                        shutil.copyfileobj(response, f)
+                    with atomic_write(file_name) as temp_path:
+                        with temp_path.open('wb') as f:
+                            while chunk := response.read(STREAM_CHUNK_SIZE):
+                                f.write(chunk)
+                                if sink is not None:
+                                    streamed = True
+                                    sink.write(chunk)
+                                    sink.flush()
                     return True
                 else:
                     logger.error(f"Failed {title}: HTTP {response.status}")
@@ -63,8 +187,16 @@ def _tts_worker(
         
         except (urllib.error.URLError, SocketTimeout) as e:
             logger.warning(f"Attempt {attempt + 1}/{MAX_RETRIES} failed for {title}: {e}")
+            if streamed:
+                # The listener already heard part of this chapter; a retry
+                # would play it again from the start.
+                logger.error(f"Stream interrupted for {title}")
+                return False
             if attempt < MAX_RETRIES - 1:
                 time.sleep(2 * (attempt + 1)) # Backoff
+        except BrokenPipeError:
+            # The listener closed the stream; nothing left to play to
+            raise
         except Exception as e:
             logger.error(f"Error processing {title}: {e}")
             # If it's not a network error, maybe don't retry? 
@@ -75,16 +207,122 @@ def _tts_worker(
     return False
 
 
+def _replacing(
+    chapters: Iterable[Tuple[str, str, int]],
+    indexes: Set[int],
+    output_dir: Path,
+    ext: str
+) -> Generator[Tuple[str, str, int], None, None]:
+    """
+    Passes through only the chapters in `indexes`, deleting their old audio first.
+
+    Audio is matched by index alone, since a revised chapter may have a new title.
+    """
+    for title, content, idx in chapters:
+        if idx in indexes:
+            for stale in output_dir.glob(f"{str(idx).zfill(4)}_*.{ext}"):
+                stale.unlink()
+            yield title, content, idx
+
+
+def _listen_ahead(
+    chapters: Iterable[Tuple[str, str, int]],
+    output_dir: Path,
+    api_url: str,
+    payload_template: Dict[str, Any],
+    sink: BinaryIO,
+    prefetch: int,
+    concurrency: int
+) -> Generator[Tuple[str, bool], None, None]:
+    """
+    Streams chapters to `sink` in reading order while prefetching the next ones.
+
+    The chapter being listened to is synthesized on the calling thread, so it
+    never waits behind background work. The next `prefetch` chapters are queued
+    on a pool of `concurrency` workers nearest-first; a queued chapter that
+    becomes current is pulled from the queue, and one that is already running is
+    awaited and then replayed from disk. Only `prefetch + 1` chapters are held
+    in memory at a time.
+
+    Yields:
+        Tuple[str, bool]: (chapter_title, success) once each chapter has been streamed.
+    """
+    chapter_iter = iter(chapters)
+    window: deque = deque()
+    pending: Dict[int, Future] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        while True:
+            # Top up to the current chapter plus `prefetch` ahead of it
+            window.extend(islice(chapter_iter, prefetch + 1 - len(window)))
+            if not window:
+                break
+            title, content, idx = window.popleft()
+
+            for next_title, next_content, next_idx in window:
+                if next_idx not in pending:
+                    pending[next_idx] = pool.submit(
+                        _tts_worker, next_content, next_title, next_idx,
+                        output_dir, api_url, payload_template
+                    )
+
+            future = pending.pop(idx, None)
+            if future is not None and not future.cancel():
+                future.result()
+
+            yield title, _tts_worker(
+                content, title, idx, output_dir, api_url, payload_template, sink
+            )
+
+
+def _synthesize_all(
+    chapters: Iterable[Tuple[str, str, int]],
+    output_dir: Path,
+    api_url: str,
+    payload_template: Dict[str, Any],
+    concurrency: int
+) -> Generator[Tuple[str, bool], None, None]:
+    """
+    Synthesizes chapters on `concurrency` workers, yielding results in order.
+
+    At most ``2 * concurrency`` chapters are in flight, which keeps memory
+    bounded for long runs.
+
+    Yields:
+        Tuple[str, bool]: (chapter_title, success) for each chapter.
+    """
+    in_flight: deque = deque()
+    limit = 2 * max(1, concurrency)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for title, content, idx in chapters:
+            in_flight.append((title, pool.submit(
+                _tts_worker, content, title, idx, output_dir, api_url, payload_template
+            )))
+            if len(in_flight) >= limit:
+                done_title, future = in_flight.popleft()
+                yield done_title, future.result()
+
+        while in_flight:
+            done_title, future = in_flight.popleft()
+            yield done_title, future.result()
+
+
 def process_tts(
     input_path: Union[str, Path],
     start_pattern: Optional[str],
     count: int,
     api_url: str,
     ref_audio_path: str,
-    regex_pattern: str = DEFAULT_CHAPTER_PATTERN
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+    concurrency: Optional[int] = None,
+    stream_to: Optional[Union[str, Path]] = None,
+    prefetch: int = DEFAULT_PREFETCH,
+    profile_path: Optional[Path] = None,
+    only: Optional[Iterable[int]] = None
 ) -> str:
     """
-    Iterates over chapters and calls TTS API for each sequentially.
+    Iterates over chapters and calls TTS API for each.
 
     Args:
         input_path: Path to novel file.
@@ -93,46 +331,63 @@ def process_tts(
         api_url: TTS API endpoint.
         ref_audio_path: Path to reference audio on the TTS server.
         regex_pattern: Regex for chapter detection.
+        concurrency: Number of chapters synthesized in parallel. Defaults to the
+            tuned profile's value, or 1.
+        stream_to: Enables listen-ahead mode. Audio is streamed in reading order
+            to this file or named pipe (``-`` for stdout) as it arrives.
+        prefetch: Chapters synthesized ahead of the listener in listen-ahead mode.
+        profile_path: Profile file written by `tts-tune`. The profile for
+            `api_url` is applied automatically if present.
+        only: Restrict synthesis to these chapter indexes, replacing any audio
+            already on disk for them (e.g. the "resynthesize" list of a merge).
+            They are positions in the whole file, so `start_pattern` must be None.
 
     Returns:
         Path to the output directory as a string.
+
+    Raises:
+        ValueError: Both `only` and `start_pattern` are given.
     """
+    if only is not None and start_pattern is not None:
+        # With a start pattern, indexes count from the start chapter instead
+        raise ValueError("Chapter positions from a changes file cannot be combined with a start pattern")
+
     input_file = Path(input_path)
     output_dir = input_file.parent / f"{input_file.stem}_tts"
     
     output_dir.mkdir(exist_ok=True)
 
-    payload_template: Dict[str, Any] = {
-        "text_lang": "zh",
-        "ref_audio_path": ref_audio_path,
-        "prompt_lang": "zh",
-        "prompt_text": "",
-        "text_split_method": "cut3",
-        "batch_size": 8,
-        "seed": 0,
-        "media_type": "aac",
-        "streaming_mode": True
-    }
+    profile = load_profile(api_url, profile_path)
+    payload_template = build_payload_template(ref_audio_path, profile)
+    if concurrency is None:
+        concurrency = int(profile.get("concurrency", 1))
+
+    # Keep stdout clean for audio when streaming to it
+    out = sys.stderr if stream_to is not None and str(stream_to) == "-" else sys.stdout
     
-    print("Starting TTS...")
+    print("Starting TTS...", file=out)
+
+    chapters = iter_chapters(input_file, start_pattern, count, regex_pattern)
+    if only is not None:
+        chapters = _replacing(chapters, set(only), output_dir, payload_template.get("media_type", "wav"))
 
     completed = 0
-    for title, content, idx in iter_chapters(input_file, start_pattern, count, regex_pattern):
-        try:
-            success = _tts_worker(
-                content, 
-                title, 
-                idx, 
-                output_dir, 
-                api_url, 
-                payload_template
+    with _open_sink(stream_to) if stream_to is not None else nullcontext() as sink:
+        if sink is not None:
+            results = _listen_ahead(
+                chapters, output_dir, api_url, payload_template,
+                sink, prefetch, concurrency
             )
+        else:
+            results = _synthesize_all(
+                chapters, output_dir, api_url, payload_template, concurrency
+            )
+
+        for title, success in results:
             if success:
                 completed += 1
-                print(f"[{completed}] Completed: {title}")
+                print(f"[{completed}] Completed: {title}", file=out)
             else:
-                print(f"[{completed}] FAILED: {title}")
-        except Exception as exc:
-            print(f"[{completed}] EXCEPTION: {title} - {exc}")
+                print(f"[{completed}] FAILED: {title}", file=out)
 
     return str(output_dir)
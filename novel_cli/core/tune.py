@@ -0,0 +1,172 @@
+"""
+Core logic for tuning TTS parameters against the target server.
+"""
+import http.client
+import json
+import logging
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .chapter import iter_chapters
+from .tts import DEFAULT_TIMEOUT, DEFAULT_TTS_PARAMS, build_payload_template, save_profile
+from ..config import DEFAULT_TTS_PROFILE
+from ..utils.audio import audio_duration
+from ..utils.text import DEFAULT_CHAPTER_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# Candidate values searched by default
+DEFAULT_BATCH_SIZES = (4, 8, 16, 32)
+DEFAULT_SPLIT_METHODS = ("cut1", "cut2", "cut3", "cut5")
+DEFAULT_CONCURRENCIES = (1, 2, 4)
+
+# Characters taken from the start of each sample chapter
+DEFAULT_SAMPLE_CHARS = 400
+DEFAULT_SAMPLE_COUNT = 4
+
+# Upper bound on measured configurations, baseline included
+DEFAULT_MAX_TRIALS = 12
+
+
+def _synthesize_sample(text: str, api_url: str, payload_template: Dict[str, Any]) -> float:
+    """
+    Synthesizes `text` once and returns the seconds of audio produced.
+    """
+    payload = payload_template.copy()
+    payload["text"] = text
+    req = urllib.request.Request(
+        api_url,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(req, timeout=DEFAULT_TIMEOUT) as response:
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        data = response.read()
+    return audio_duration(data, payload_template.get("media_type", "wav"))
+
+
+def _measure(
+    samples: List[str],
+    api_url: str,
+    payload_template: Dict[str, Any],
+    concurrency: int
+) -> float:
+    """
+    Synthesizes all samples on `concurrency` workers.
+
+    Returns:
+        Audio seconds produced per wall-clock second, or 0.0 if any request failed.
+    """
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            audio_seconds = sum(pool.map(
+                lambda text: _synthesize_sample(text, api_url, payload_template),
+                samples
+            ))
+    # OSError covers URLError, timeouts and resets while reading the body
+    except (OSError, http.client.HTTPException, RuntimeError, ValueError) as e:
+        logger.warning(f"Trial failed: {e}")
+        return 0.0
+    elapsed = time.perf_counter() - start
+    return audio_seconds / elapsed if elapsed > 0 else 0.0
+
+
+def tune_tts(
+    input_path: Union[str, Path],
+    api_url: str,
+    ref_audio_path: str,
+    start_pattern: Optional[str] = None,
+    sample_count: int = DEFAULT_SAMPLE_COUNT,
+    sample_chars: int = DEFAULT_SAMPLE_CHARS,
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    split_methods: Sequence[str] = DEFAULT_SPLIT_METHODS,
+    concurrencies: Sequence[int] = DEFAULT_CONCURRENCIES,
+    max_trials: int = DEFAULT_MAX_TRIALS,
+    profile_path: Optional[Path] = None
+) -> str:
+    """
+    Searches TTS parameters for the highest throughput and saves the best profile.
+
+    Throughput is audio seconds produced per wall-clock second over a sample of
+    chapters. The search is coordinate descent from the built-in defaults: each
+    of batch size, split method and client concurrency is varied in turn while
+    the others keep their best value so far, stopping after `max_trials`
+    measurements.
+
+    Args:
+        input_path: Path to novel file.
+        api_url: TTS API endpoint.
+        ref_audio_path: Path to reference audio on the TTS server.
+        start_pattern: Chapter to take the first sample from.
+        sample_count: Number of sample chapters.
+        sample_chars: Characters taken from the start of each sample chapter.
+        regex_pattern: Regex for chapter detection.
+        batch_sizes: Candidate `batch_size` values.
+        split_methods: Candidate `text_split_method` values.
+        concurrencies: Candidate client concurrency values.
+        max_trials: Maximum number of configurations measured.
+        profile_path: Profile file to update (defaults to NOVEL_CLI_TTS_PROFILE).
+
+    Returns:
+        Path to the profile file as a string.
+    """
+    samples = [
+        content[:sample_chars]
+        for _, content, _ in iter_chapters(input_path, start_pattern, sample_count, regex_pattern)
+    ]
+    if not samples:
+        raise ValueError("No sample chapters found")
+
+    best: Dict[str, Any] = {
+        "batch_size": DEFAULT_TTS_PARAMS["batch_size"],
+        "text_split_method": DEFAULT_TTS_PARAMS["text_split_method"],
+        "concurrency": 1,
+    }
+
+    # Warm up so model loading is not charged to the baseline
+    _measure(samples[:1], api_url, build_payload_template(ref_audio_path, best), 1)
+
+    def score(candidate: Dict[str, Any]) -> float:
+        throughput = _measure(
+            samples, api_url,
+            build_payload_template(ref_audio_path, candidate),
+            int(candidate["concurrency"])
+        )
+        print(
+            f"batch_size={candidate['batch_size']} "
+            f"text_split_method={candidate['text_split_method']} "
+            f"concurrency={candidate['concurrency']}: {throughput:.2f} audio s/s"
+        )
+        return throughput
+
+    best_score = score(best)
+    trials = 1
+
+    search_space = (
+        ("batch_size", batch_sizes),
+        ("text_split_method", split_methods),
+        ("concurrency", concurrencies),
+    )
+    for key, candidates in search_space:
+        for value in candidates:
+            if trials >= max_trials:
+                break
+            if value == best[key]:
+                continue
+            candidate = dict(best, **{key: value})
+            throughput = score(candidate)
+            trials += 1
+            if throughput > best_score:
+                best, best_score = candidate, throughput
+
+    if best_score <= 0:
+        raise RuntimeError("All tuning trials failed; is the TTS server reachable?")
+
+    best["throughput"] = round(best_score, 3)
+    return str(save_profile(api_url, best, profile_path or DEFAULT_TTS_PROFILE))
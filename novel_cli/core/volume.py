@@ -2,12 +2,12 @@
 Core logic for adding volume markers to novel files.
 """
 import logging
-import re
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 
-from ..utils.file import atomic_write
-from ..utils.text import DEFAULT_CHAPTER_PATTERN, detect_encoding
+from ..utils.file import compressed_path, open_input, open_sink, plain_path
+from ..utils.memory import check_budget, iter_bounded_lines, write_buffer_size
+from ..utils.text import DEFAULT_CHAPTER_PATTERN, detect_encoding, get_chapter_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +15,11 @@ logger = logging.getLogger(__name__)
 def add_markers(
     input_path: Union[str, Path],
     volume_step: int = 50,
-    regex_pattern: str = DEFAULT_CHAPTER_PATTERN
+    regex_pattern: str = DEFAULT_CHAPTER_PATTERN,
+    max_memory: Optional[int] = None,
+    compression: Optional[str] = None,
+    output_path: Optional[Union[str, Path]] = None,
+    fsync: bool = False
 ) -> str:
     """
     Reads a novel file and adds volume markers every `volume_step` chapters.
@@ -24,34 +28,43 @@ def add_markers(
         input_path: Path to source novel file.
         volume_step: Number of chapters per volume.
         regex_pattern: Regex to identify chapter lines.
+        max_memory: Optional memory budget in bytes; lines too long for it
+            raise `MemoryBudgetError`. The file is always streamed.
+        compression: Optional output compression ("gzip", "xz", "bz2").
+            Compressed input is detected and decompressed automatically.
+        output_path: Output file, or "-" for stdout. Defaults to
+            `<stem>_with_volumes<suffix>` next to the input.
+        fsync: Make the write durable before returning.
 
     Returns:
         The path to the generated output file.
     """
+    check_budget(max_memory)
     input_file = Path(input_path)
-    output_filename = input_file.with_name(f"{input_file.stem}_with_volumes{input_file.suffix}")
+    named = plain_path(input_file)
+    output_filename = output_path or compressed_path(
+        named.with_name(f"{named.stem}_with_volumes{named.suffix}"), compression
+    )
     encoding = detect_encoding(input_file)
 
-    # Pre-compile regex for performance in loop
-    chapter_regex = re.compile(regex_pattern)
+    # Literal-prefiltered matcher: most body lines never reach the regex
+    match_chapter = get_chapter_matcher(regex_pattern).match
     
     chapter_count = 0
 
-    with atomic_write(output_filename) as temp_path:
-        with input_file.open('r', encoding=encoding) as infile, \
-             temp_path.open('w', encoding='utf-8') as outfile:
+    with open_input(input_file, 'r', encoding=encoding) as infile, \
+         open_sink(output_filename, 'utf-8', compression, fsync, write_buffer_size(max_memory)) as outfile:
 
-            for line in infile:
-                # Use pre-compiled regex match
-                match = chapter_regex.match(line)
+        for line in iter_bounded_lines(infile, max_memory):
+            match = match_chapter(line)
 
-                if match:
-                    if chapter_count % volume_step == 0:
-                        volume_num = (chapter_count // volume_step) + 1
-                        outfile.write(f"\n第{volume_num}卷\n\n")
+            if match:
+                if chapter_count % volume_step == 0:
+                    volume_num = (chapter_count // volume_step) + 1
+                    outfile.write(f"\n第{volume_num}卷\n\n")
 
-                    chapter_count += 1
+                chapter_count += 1
 
-                outfile.write(line)
+            outfile.write(line)
 
     return str(output_filename)
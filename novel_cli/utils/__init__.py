@@ -1,20 +1,41 @@
 """
 Utility modules for novel-cli.
 """
-from .file import atomic_write
+from .file import atomic_write, detect_compression, open_input, open_sink, replace_file
+from .memory import MemoryBudgetError, parse_size
 from .text import (
+    BUILTIN_PATTERNS,
     DEFAULT_CHAPTER_PATTERN,
+    ChapterMatcher,
+    combine_patterns,
     detect_encoding,
+    extract_literals,
     get_chapter_match,
+    get_chapter_matcher,
     get_compiled_pattern,
+    parse_chapter_number,
+    parse_chinese_numeral,
     sanitize_filename,
 )
 
 __all__ = [
     "atomic_write",
+    "detect_compression",
+    "open_input",
+    "open_sink",
+    "replace_file",
+    "MemoryBudgetError",
+    "parse_size",
+    "BUILTIN_PATTERNS",
     "DEFAULT_CHAPTER_PATTERN",
+    "ChapterMatcher",
+    "combine_patterns",
     "detect_encoding",
+    "extract_literals",
     "get_chapter_match",
+    "get_chapter_matcher",
     "get_compiled_pattern",
+    "parse_chapter_number",
+    "parse_chinese_numeral",
     "sanitize_filename",
 ]
@@ -0,0 +1,232 @@
+"""
+Audio container utilities for novel-cli.
+
+Only the container framing is inspected; no audio is decoded.
+"""
+import io
+import struct
+from typing import BinaryIO, Generator, Optional, Tuple
+
+# ADTS sampling_frequency_index -> sample rate
+ADTS_SAMPLE_RATES = (
+    96000, 88200, 64000, 48000, 44100, 32000,
+    24000, 22050, 16000, 12000, 11025, 8000, 7350,
+)
+
+# Samples per AAC raw data block
+AAC_FRAME_SAMPLES = 1024
+
+# Bytes read per chunk when copying audio streams
+COPY_CHUNK_SIZE = 256 * 1024
+
+# Largest size a RIFF header can declare
+_RIFF_LIMIT = 0xFFFFFFFF
+
+
+def _adts_header(data, pos: int) -> Optional[Tuple[int, int, int]]:
+    """
+    Parses the ADTS header at `pos`.
+
+    Returns:
+        (frame_length, sample_count, sample_rate), or None if `pos` does not
+        start a valid header.
+    """
+    if data[pos] != 0xFF or (data[pos + 1] & 0xF6) != 0xF0:
+        return None
+    rate_index = (data[pos + 2] >> 2) & 0x0F
+    if rate_index >= len(ADTS_SAMPLE_RATES):
+        return None
+    frame_length = (
+        ((data[pos + 3] & 0x03) << 11)
+        | (data[pos + 4] << 3)
+        | (data[pos + 5] >> 5)
+    )
+    if frame_length < 7:
+        return None
+    blocks = (data[pos + 6] & 0x03) + 1
+    return frame_length, blocks * AAC_FRAME_SAMPLES, ADTS_SAMPLE_RATES[rate_index]
+
+
+def iter_adts_frames(data: bytes) -> Generator[Tuple[int, int, int], None, None]:
+    """
+    Walks ADTS frames in an AAC byte string.
+
+    Yields:
+        Tuple[int, int, int]: (offset, frame_length, sample_count) per frame.
+        Iteration stops at the first byte that is not a complete frame header.
+    """
+    offset = 0
+    size = len(data)
+    while offset + 7 <= size:
+        header = _adts_header(data, offset)
+        if header is None or offset + header[0] > size:
+            return
+        frame_length, samples, _ = header
+        yield offset, frame_length, samples
+        offset += frame_length
+
+
+def adts_sample_rate(data: bytes) -> int:
+    """
+    Returns the sample rate declared by the first ADTS frame header.
+    """
+    header = _adts_header(data, 0) if len(data) >= 7 else None
+    if header is None:
+        raise ValueError("Not an ADTS stream")
+    return header[2]
+
+
+def adts_duration(data: bytes) -> float:
+    """
+    Returns the duration in seconds of the complete ADTS frames in `data`.
+    """
+    if not data:
+        return 0.0
+    samples = sum(count for _, _, count in iter_adts_frames(data))
+    return samples / adts_sample_rate(data)
+
+
+def copy_adts_frames(src: BinaryIO, dst: BinaryIO, chunk_size: int = COPY_CHUNK_SIZE) -> Tuple[int, int]:
+    """
+    Copies the ADTS frames of `src` to `dst` without re-encoding.
+
+    Bytes outside frames (ID3 tags, a truncated final frame) are dropped, so
+    streams copied back to back form one valid ADTS stream. Memory use is
+    bounded by `chunk_size` plus one frame.
+
+    Returns:
+        Tuple[int, int]: (sample_count, sample_rate); sample_rate is 0 if no
+        frame was found.
+
+    Raises:
+        ValueError: The frames change sample rate mid-stream.
+    """
+    buf = bytearray()
+    samples = 0
+    sample_rate = 0
+
+    while True:
+        chunk = src.read(chunk_size)
+        buf += chunk
+        pos = 0
+        run_start = 0
+        size = len(buf)
+
+        while pos + 7 <= size:
+            header = _adts_header(buf, pos)
+            if header is None:
+                # Resynchronise on the next candidate sync byte
+                if run_start < pos:
+                    dst.write(buf[run_start:pos])
+                nxt = buf.find(b"\xff", pos + 1)
+                pos = nxt if nxt != -1 else size
+                run_start = pos
+                continue
+            frame_length, frame_samples, rate = header
+            if pos + frame_length > size:
+                break
+            if sample_rate and rate != sample_rate:
+                raise ValueError(f"Sample rate changes from {sample_rate} to {rate}")
+            sample_rate = rate
+            samples += frame_samples
+            pos += frame_length
+
+        if run_start < pos:
+            dst.write(buf[run_start:pos])
+        del buf[:pos]
+
+        if not chunk:
+            return samples, sample_rate
+
+
+def read_wav_header(f: BinaryIO) -> Tuple[bytes, int, int]:
+    """
+    Locates the fmt chunk and PCM payload of a seekable RIFF/WAVE stream.
+
+    Streaming servers often leave the RIFF and data sizes unset, so the data
+    chunk is taken to run to the end of the input whenever its declared size
+    is zero or larger than what is actually there.
+
+    Returns:
+        Tuple[bytes, int, int]: (fmt_chunk_body, data_offset, data_length).
+        The stream is left positioned at data_offset.
+    """
+    start = f.tell()
+    end = f.seek(0, io.SEEK_END)
+    f.seek(start)
+
+    riff = f.read(12)
+    if len(riff) < 12 or riff[0:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE stream")
+
+    fmt = b""
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("WAVE stream has no data chunk")
+        chunk_id = header[0:4]
+        (chunk_size,) = struct.unpack("<I", header[4:8])
+        body = f.tell()
+        if chunk_id == b"fmt ":
+            fmt = f.read(chunk_size)
+        elif chunk_id == b"data":
+            if not fmt:
+                raise ValueError("WAVE stream has no fmt chunk")
+            available = end - body
+            if chunk_size == 0 or chunk_size > available:
+                chunk_size = available
+            f.seek(body)
+            return fmt, body, chunk_size
+        f.seek(body + chunk_size + (chunk_size & 1))
+
+
+def wav_byte_rate(fmt: bytes) -> int:
+    """
+    Returns the byte rate field of a WAVE fmt chunk body.
+    """
+    (byte_rate,) = struct.unpack_from("<I", fmt, 8)
+    return byte_rate
+
+
+def write_wav_header(dst: BinaryIO, fmt: bytes, data_length: int) -> None:
+    """
+    Writes a RIFF/WAVE header with a single fmt chunk and a data chunk of `data_length`.
+    """
+    riff_size = 4 + (8 + len(fmt) + (len(fmt) & 1)) + 8 + data_length
+    if riff_size > _RIFF_LIMIT:
+        raise ValueError("WAVE output exceeds the 4 GiB RIFF limit")
+    dst.write(b"RIFF" + struct.pack("<I", riff_size) + b"WAVE")
+    dst.write(b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"\0" * (len(fmt) & 1))
+    dst.write(b"data" + struct.pack("<I", data_length))
+
+
+def parse_wav_header(data: bytes) -> Tuple[int, int, int]:
+    """
+    Locates the PCM payload of a RIFF/WAVE byte string.
+
+    Returns:
+        Tuple[int, int, int]: (byte_rate, data_offset, data_length)
+    """
+    fmt, offset, length = read_wav_header(io.BytesIO(data))
+    return wav_byte_rate(fmt), offset, length
+
+
+def wav_duration(data: bytes) -> float:
+    """
+    Returns the duration in seconds of the PCM payload in a WAV byte string.
+    """
+    byte_rate, _, length = parse_wav_header(data)
+    if not byte_rate:
+        raise ValueError("WAVE stream has no byte rate")
+    return length / byte_rate
+
+
+def audio_duration(data: bytes, media_type: str) -> float:
+    """
+    Returns the duration in seconds of `data` in the given TTS `media_type`.
+    """
+    if media_type == "aac":
+        return adts_duration(data)
+    if media_type == "wav":
+        return wav_duration(data)
+    raise ValueError(f"Unsupported media type: {media_type}")
@@ -1,23 +1,78 @@
 """
 File utilities for novel-cli.
 """
+import bz2
+import gzip
+import io
+import lzma
+import os
+import sys
 import uuid
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Generator
+from typing import IO, BinaryIO, Generator, Optional, Union
+
+# Leading bytes identifying each supported compression format
+COMPRESSION_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "xz": b"\xfd7zXZ\x00",
+    "bz2": b"BZh",
+}
+
+# File suffix written for each output compression format
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "xz": ".xz", "bz2": ".bz2"}
+
+_OPENERS = {"gzip": gzip.open, "xz": lzma.open, "bz2": bz2.open}
+
+# Write buffer for output sinks; batches many lines into each write syscall
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# gzip level for compressed output; 6 is much faster than the module's 9
+SINK_GZIP_LEVEL = 6
+
+# Output target meaning standard output
+STDOUT_TARGET = "-"
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Persists a rename; a no-op where directories cannot be opened (Windows)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def replace_file(source: Path, destination: Path, fsync: bool = False) -> None:
+    """
+    Renames `source` over `destination` in one step, so readers never see it
+    missing. With `fsync`, the rename itself is flushed to disk.
+    """
+    os.replace(source, destination)
+    if fsync:
+        _fsync_dir(destination.parent)
 
 
 @contextmanager
-def atomic_write(output_path: Path, suffix: str = "") -> Generator[Path, None, None]:
+def atomic_write(output_path: Path, suffix: str = "", fsync: bool = False) -> Generator[Path, None, None]:
     """
     Context manager for atomic file writing.
     
-    Writes to a temporary file first, then atomically renames on success.
+    Writes to a temporary file first, then atomically replaces the output on
+    success, so the old file stays in place until the new one is complete.
     Automatically cleans up the temp file on failure.
     
     Args:
         output_path: Final destination path.
         suffix: Optional suffix for the temp file (e.g., ".txt").
+        fsync: Flush the temp file to disk before the rename and the
+            directory after it, so a crash leaves either the old or the new
+            file, complete.
     
     Yields:
         Path to the temporary file for writing.
@@ -25,12 +80,139 @@ def atomic_write(output_path: Path, suffix: str = "") -> Generator[Path, None, N
     temp_path = output_path.parent / f"{output_path.stem}_{uuid.uuid4().hex[:8]}{suffix or output_path.suffix}"
     try:
         yield temp_path
-        # Success: atomic rename
-        if output_path.exists():
-            output_path.unlink()
-        temp_path.rename(output_path)
-    except Exception:
-        # Failure: cleanup temp file
+        if fsync:
+            fd = os.open(temp_path, os.O_RDWR)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        # Success: atomic replace
+        replace_file(temp_path, output_path, fsync)
+    except BaseException:
+        # Failure (including cancellation): cleanup temp file
         if temp_path.exists():
             temp_path.unlink()
         raise
+
+
+def _compressor(raw: BinaryIO, compression: str) -> BinaryIO:
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=SINK_GZIP_LEVEL)
+    if compression == "xz":
+        return lzma.LZMAFile(raw, 'wb')
+    if compression == "bz2":
+        return bz2.BZ2File(raw, 'wb')
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+@contextmanager
+def _layered(
+    raw: BinaryIO,
+    encoding: Optional[str],
+    compression: Optional[str]
+) -> Generator[IO, None, None]:
+    """
+    Stacks the optional compressor and text encoder on `raw`, and unwinds them
+    without closing `raw` itself.
+    """
+    binary = _compressor(raw, compression) if compression else raw
+    stream = io.TextIOWrapper(binary, encoding=encoding) if encoding else binary
+    try:
+        yield stream
+    finally:
+        if encoding:
+            # Flushes, and keeps the wrapper from closing `raw` when collected
+            stream.detach()
+        if compression:
+            # Writes the trailer; the underlying file stays open
+            binary.close()
+        raw.flush()
+
+
+@contextmanager
+def open_sink(
+    target: Union[str, Path],
+    encoding: Optional[str] = 'utf-8',
+    compression: Optional[str] = None,
+    fsync: bool = False,
+    buffer_size: int = WRITE_BUFFER_SIZE
+) -> Generator[IO, None, None]:
+    """
+    Opens a command's output for writing.
+
+    A file target is written through `atomic_write` with a `buffer_size`
+    write buffer; "-" writes to stdout (which may be a pipe). Text is encoded
+    with `encoding`; pass None to get the binary stream itself and write
+    bytes that need no transcoding. `compression` ("gzip", "xz", "bz2")
+    compresses whatever is written.
+
+    Yields:
+        A text stream, or a binary stream when `encoding` is None.
+    """
+    if str(target) == STDOUT_TARGET:
+        sys.stdout.flush()
+        with _layered(sys.stdout.buffer, encoding, compression) as stream:
+            yield stream
+        return
+
+    with atomic_write(Path(target), fsync=fsync) as temp_path:
+        with open(temp_path, 'wb', buffering=buffer_size) as raw:
+            with _layered(raw, encoding, compression) as stream:
+                yield stream
+
+
+def detect_compression(path: Union[str, Path]) -> Optional[str]:
+    """
+    Identifies a gzip, xz or bz2 file by its magic bytes.
+
+    Returns:
+        "gzip", "xz", "bz2", or None for an uncompressed (or unreadable) file.
+    """
+    try:
+        with Path(path).open('rb') as f:
+            head = f.read(6)
+    except OSError:
+        return None
+    for name, magic in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_input(path: Union[str, Path], mode: str = 'r', encoding: Optional[str] = None) -> IO:
+    """
+    Opens a novel file for reading, decompressing gzip/xz/bz2 input on the fly.
+
+    Compression is detected from the content, not the file name. Compressed
+    files are sequential streams: seeking backwards re-decompresses from the
+    start, so callers needing random access should reject them.
+
+    Args:
+        path: File to open.
+        mode: 'r' for text or 'rb' for bytes.
+        encoding: Text encoding for mode 'r'.
+    """
+    path = Path(path)
+    compression = detect_compression(path)
+    if compression is None:
+        return path.open(mode, encoding=encoding)
+    return _OPENERS[compression](path, mode if 'b' in mode else 'rt', encoding=encoding)
+
+
+def plain_path(path: Union[str, Path]) -> Path:
+    """
+    Drops a compression suffix, so `novel.txt.gz` names outputs like `novel.txt`.
+    """
+    path = Path(path)
+    if path.suffix.lower() in COMPRESSION_SUFFIXES.values():
+        return path.with_suffix("")
+    return path
+
+
+def compressed_path(path: Path, compression: Optional[str]) -> Path:
+    """
+    Appends the suffix for `compression` to an output path.
+    """
+    if compression is None:
+        return path
+    return path.with_name(path.name + COMPRESSION_SUFFIXES[compression])
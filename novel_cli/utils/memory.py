@@ -0,0 +1,93 @@
+"""
+Memory budget utilities for novel-cli.
+
+A budget (`max_memory`, in bytes) switches the core commands to streaming or
+bounded-buffer code paths. Text is charged at 4 bytes per character, the
+widest CPython string storage, so the limits hold for any script.
+"""
+import re
+from typing import Generator, Iterator, Optional, TextIO
+
+from .file import WRITE_BUFFER_SIZE
+
+# Smallest budget the streaming paths can honour: read buffers plus a line
+MIN_MEMORY_BUDGET = 1024 * 1024
+
+# Bytes charged per character of buffered text
+BYTES_PER_CHAR = 4
+
+_SIZE_PATTERN = re.compile(r"^\s*(\d+)\s*([KMG]?)i?B?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+class MemoryBudgetError(MemoryError):
+    """The work cannot be done within the requested memory budget."""
+
+
+def parse_size(value: str) -> int:
+    """
+    Parses a byte count such as "65536", "512K", "64M" or "2GiB".
+    """
+    match = _SIZE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(match.group(1)) * _SIZE_UNITS[match.group(2).upper()]
+
+
+def check_budget(max_memory: Optional[int]) -> None:
+    """
+    Fails fast when `max_memory` is below what any code path needs.
+    """
+    if max_memory is not None and max_memory < MIN_MEMORY_BUDGET:
+        raise MemoryBudgetError(
+            f"Memory budget of {max_memory} bytes is below the minimum of {MIN_MEMORY_BUDGET} bytes"
+        )
+
+
+def max_text_chars(max_memory: int) -> int:
+    """
+    Returns how many characters of text may be buffered under `max_memory`.
+
+    Buffered text is usually held twice (as lines, then joined or corrected),
+    so half the budget is available for it.
+    """
+    return max_memory // (2 * BYTES_PER_CHAR)
+
+
+def write_buffer_size(max_memory: Optional[int]) -> int:
+    """
+    Returns the output buffer size for `open_sink`: the full default without a
+    budget, otherwise at most an eighth of the budget.
+    """
+    if max_memory is None:
+        return WRITE_BUFFER_SIZE
+    return min(WRITE_BUFFER_SIZE, max_memory // 8)
+
+
+def iter_bounded_lines(f: TextIO, max_memory: Optional[int]) -> Iterator[str]:
+    """
+    Iterates the lines of a text file, refusing any line too long for the budget.
+
+    Without a budget the file itself is returned, so plain line iteration
+    costs nothing extra.
+
+    Raises:
+        MemoryBudgetError: A line is longer than `max_text_chars(max_memory)`.
+    """
+    if max_memory is None:
+        return f
+    return _bounded_lines(f, max_memory)
+
+
+def _bounded_lines(f: TextIO, max_memory: int) -> Generator[str, None, None]:
+    limit = max_text_chars(max_memory)
+    readline = f.readline
+    while True:
+        line = readline(limit + 1)
+        if not line:
+            return
+        if len(line) > limit:
+            raise MemoryBudgetError(
+                f"A line longer than {limit} characters does not fit a memory budget of {max_memory} bytes"
+            )
+        yield line
@@ -4,11 +4,44 @@ Shared text utilities for novel-cli.
 import re
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Union
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Union
+
+from .file import open_input
+
+try:
+    from re import _parser as _sre_parse
+    from re import _constants as _sre_constants
+except ImportError:  # pragma: no cover - Python < 3.11
+    import sre_parse as _sre_parse
+    import sre_constants as _sre_constants
 
 # Default regex pattern for matching chapter titles
 DEFAULT_CHAPTER_PATTERN = r"^\s*第[0-9零一二三四五六七八九十百千]+章(?:\s|$)"
 
+_NUMERAL_CLASS = "[0-9零〇一二两三四五六七八九十百千万]"
+
+# Named heading patterns selectable with `-r NAME`
+BUILTIN_PATTERNS: Dict[str, str] = {
+    "chapter": DEFAULT_CHAPTER_PATTERN,
+    "hui": rf"^\s*第{_NUMERAL_CLASS}+回(?:\s|$)",
+    "section": rf"^\s*第{_NUMERAL_CLASS}+节(?:\s|$)",
+    "english": r"^\s*Chapter\s+\d+\b",
+    "volume": rf"^\s*第{_NUMERAL_CLASS}+卷(?:\s|$)",
+    "prologue": r"^\s*(?:序章|序言|楔子|引子)(?:\s|$)",
+}
+
+_NAMED_PATTERN = re.compile(r"^([A-Za-z_]\w*)=(.*)$", re.DOTALL)
+
+# Chapter number inside a title: 第12章, 第一百零三回, 第２节
+_CHAPTER_NUMBER_PATTERN = re.compile(r"第\s*([0-9０-９零〇一二两三四五六七八九十百千万]+)")
+_ASCII_NUMBER_PATTERN = re.compile(r"\d+")
+
+_CN_DIGITS = {
+    "零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+    "五": 5, "六": 6, "七": 7, "八": 8, "九": 9,
+}
+_CN_UNITS = {"十": 10, "百": 100, "千": 1000}
+
 
 @lru_cache(maxsize=8)
 def get_compiled_pattern(pattern: str) -> re.Pattern:
@@ -19,13 +52,190 @@ def get_compiled_pattern(pattern: str) -> re.Pattern:
     return re.compile(pattern)
 
 
+def combine_patterns(specs: Iterable[str]) -> str:
+    """
+    Combines heading pattern specs into one regex string.
+
+    Each spec is a builtin name ("chapter", "volume", ...), "name=regex", or a
+    bare regex. A single bare regex is returned unchanged; otherwise every spec
+    becomes a named alternative, so `match.lastgroup` tells which one matched.
+    """
+    specs = list(specs)
+    if not specs:
+        return DEFAULT_CHAPTER_PATTERN
+    if len(specs) == 1 and specs[0] not in BUILTIN_PATTERNS and not _NAMED_PATTERN.match(specs[0]):
+        return specs[0]
+
+    alternatives = []
+    for i, spec in enumerate(specs):
+        if spec in BUILTIN_PATTERNS:
+            name, regex = spec, BUILTIN_PATTERNS[spec]
+        elif named := _NAMED_PATTERN.match(spec):
+            name, regex = named.group(1), named.group(2)
+        else:
+            name, regex = f"pattern{i + 1}", spec
+        alternatives.append(f"(?P<{name}>{regex})")
+    return "|".join(alternatives)
+
+
+def _required_literals(items) -> Optional[FrozenSet[str]]:
+    """
+    Returns strings of which every match of the parsed pattern `items` contains
+    at least one, or None if no such set can be derived.
+
+    Runs of literal characters in the top-level sequence are candidates, as
+    are required groups and repeats; alternations contribute the union of what
+    each branch requires. The longest single candidate wins.
+    """
+    candidates: List[FrozenSet[str]] = []
+    run: List[str] = []
+
+    def flush() -> None:
+        if run:
+            candidates.append(frozenset(["".join(run)]))
+            run.clear()
+
+    for op, arg in items:
+        if op is _sre_constants.LITERAL:
+            run.append(chr(arg))
+            continue
+        flush()
+        if op is _sre_constants.SUBPATTERN:
+            _, add_flags, _, sub = arg
+            if not add_flags & _sre_constants.SRE_FLAG_IGNORECASE:
+                found = _required_literals(sub)
+                if found:
+                    candidates.append(found)
+        elif op in (_sre_constants.MAX_REPEAT, _sre_constants.MIN_REPEAT):
+            low, _, sub = arg
+            if low >= 1:
+                found = _required_literals(sub)
+                if found:
+                    candidates.append(found)
+        elif op is _sre_constants.BRANCH:
+            branches = [_required_literals(branch) for branch in arg[1]]
+            if all(branches):
+                candidates.append(frozenset().union(*branches))
+    flush()
+
+    if not candidates:
+        return None
+    # Prefer one long literal over many alternatives
+    return max(candidates, key=lambda c: (min(len(s) for s in c), -len(c)))
+
+
+def extract_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """
+    Derives a literal prefilter for `pattern`: a line can only match if it
+    contains one of the returned strings. None means no safe prefilter exists.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return None
+    if parsed.state.flags & _sre_constants.SRE_FLAG_IGNORECASE:
+        return None
+    return _required_literals(parsed)
+
+
+class ChapterMatcher:
+    """
+    Heading matcher that rejects lines lacking a required literal before
+    running the regex, so body text costs about one `str.find` per line.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.regex = get_compiled_pattern(pattern)
+        self.literals = extract_literals(pattern)
+        self.match: Callable[[str], Optional[re.Match]] = self._build_match()
+
+    def _build_match(self) -> Callable[[str], Optional[re.Match]]:
+        regex_match = self.regex.match
+        literals = self.literals
+        if not literals:
+            return regex_match
+        if len(literals) == 1:
+            (literal,) = literals
+
+            def match(line: str) -> Optional[re.Match]:
+                return regex_match(line) if literal in line else None
+            return match
+
+        ordered = tuple(sorted(literals, key=len, reverse=True))
+
+        def match_any(line: str) -> Optional[re.Match]:
+            for literal in ordered:
+                if literal in line:
+                    return regex_match(line)
+            return None
+        return match_any
+
+
+@lru_cache(maxsize=8)
+def get_chapter_matcher(pattern: str = DEFAULT_CHAPTER_PATTERN) -> ChapterMatcher:
+    """
+    Returns a cached `ChapterMatcher` for `pattern`.
+    """
+    return ChapterMatcher(pattern)
+
+
 def get_chapter_match(line: str, pattern: str = DEFAULT_CHAPTER_PATTERN) -> Optional[re.Match]:
     """
     Checks if a line matches the chapter pattern.
-    Uses cached compiled pattern for better performance.
+    Uses a cached, literal-prefiltered matcher for better performance.
+    """
+    return get_chapter_matcher(pattern).match(line)
+
+
+def parse_chinese_numeral(text: str) -> int:
+    """
+    Converts a Chinese numeral such as "一百零三" or "十二" to an int.
+    Digit-only forms ("一〇三") are read positionally.
+    """
+    if all(c in _CN_DIGITS for c in text):
+        value = 0
+        for c in text:
+            value = value * 10 + _CN_DIGITS[c]
+        return value
+
+    total = 0
+    section = 0
+    digit = 0
+    for c in text:
+        if c in _CN_DIGITS:
+            digit = _CN_DIGITS[c]
+        elif c in _CN_UNITS:
+            # A bare unit ("十二") means one of it
+            section += (digit or 1) * _CN_UNITS[c]
+            digit = 0
+        elif c == "万":
+            total += (section + digit) * 10000
+            section = 0
+            digit = 0
+        else:
+            raise ValueError(f"Not a Chinese numeral: {text}")
+    return total + section + digit
+
+
+def parse_chapter_number(title: str) -> Optional[int]:
+    """
+    Extracts the chapter number from a title, e.g. "第一百零三章 标题" -> 103.
+    Falls back to the first ASCII number ("Chapter 12") and returns None if
+    the title has no number.
     """
-    compiled = get_compiled_pattern(pattern)
-    return compiled.match(line)
+    match = _CHAPTER_NUMBER_PATTERN.search(title)
+    if match:
+        numeral = match.group(1)
+        # Full-width digits count as digits for int()
+        if numeral.isdigit():
+            return int(numeral)
+        try:
+            return parse_chinese_numeral(numeral)
+        except ValueError:
+            return None
+    match = _ASCII_NUMBER_PATTERN.search(title)
+    return int(match.group()) if match else None
 
 
 def sanitize_filename(name: str) -> str:
@@ -42,11 +252,12 @@ def detect_encoding(file_path: Union[str, Path]) -> str:
     """
     Detect file encoding by attempting to read with UTF-8 first,
     falling back to GB18030 for Chinese text files.
+    Compressed files are sampled after decompression.
     """
     path = Path(file_path)
     try:
         # Just read a small chunk
-        with path.open('r', encoding='utf-8') as f:
+        with open_input(path, 'r', encoding='utf-8') as f:
             f.read(1024)
         return 'utf-8'
     except UnicodeDecodeError:
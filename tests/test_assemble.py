@@ -0,0 +1,97 @@
+import io
+import struct
+import unittest
+import tempfile
+import shutil
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+from novel_cli import __main__ as cli
+from novel_cli.core import assemble
+from novel_cli.utils.audio import adts_duration, copy_adts_frames, wav_duration
+
+
+def _adts_frame(payload_size=9):
+    """Builds one 44.1 kHz stereo ADTS frame with a dummy payload."""
+    length = 7 + payload_size
+    return bytes([
+        0xFF, 0xF1,
+        (1 << 6) | (4 << 2),
+        (2 << 6) | (length >> 11),
+        (length >> 3) & 0xFF,
+        ((length & 0x07) << 5) | 0x1F,
+        0xFC,
+    ]) + bytes(payload_size)
+
+
+def _wav(pcm, streaming=False):
+    """16 kHz mono 16-bit WAV; streaming servers leave the sizes at zero."""
+    fmt = struct.pack("<HHIIHH", 1, 1, 16000, 32000, 2, 16)
+    size = 0 if streaming else len(pcm)
+    return (b"RIFF" + struct.pack("<I", 0 if streaming else 36 + size) + b"WAVE"
+            + b"fmt " + struct.pack("<I", 16) + fmt
+            + b"data" + struct.pack("<I", size) + pcm)
+
+
+class TestAssemble(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.novel = self.test_dir / "novel.txt"
+        self.novel.write_text("", encoding='utf-8')
+        self.tts_dir = self.test_dir / "novel_tts"
+        self.tts_dir.mkdir()
+        self.out_dir = self.test_dir / "novel_audiobook"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_copy_adts_skips_junk(self):
+        frames = _adts_frame() * 5
+        src = io.BytesIO(b"ID3junk" + frames + _adts_frame()[:10])
+        out = io.BytesIO()
+        samples, rate = copy_adts_frames(src, out, chunk_size=7)
+        self.assertEqual(out.getvalue(), frames)
+        self.assertEqual((samples, rate), (5 * 1024, 44100))
+
+    def test_assemble_aac(self):
+        for i in range(1, 6):
+            (self.tts_dir / f"{i:04d}_第{i}章.aac").write_bytes(_adts_frame() * (i * 43))
+
+        assemble.assemble_volumes(self.novel, volume_step=2)
+
+        vol1 = (self.out_dir / "novel_vol001.aac").read_bytes()
+        self.assertEqual(vol1, _adts_frame() * (43 + 86))
+        self.assertAlmostEqual(adts_duration(vol1), 129 * 1024 / 44100)
+        self.assertTrue((self.out_dir / "novel_vol003.aac").exists())
+        self.assertFalse((self.out_dir / "novel_vol004.aac").exists())
+
+        cue = (self.out_dir / "novel_vol002.cue").read_text(encoding='utf-8')
+        self.assertIn('TITLE "第3章"', cue)
+        self.assertIn('TITLE "第4章"', cue)
+        # Chapter 3 is 129 frames * 1024 / 44100 s ~= 2.995 s, i.e. 225 CUE frames
+        self.assertIn("INDEX 01 00:03:00", cue)
+
+    def test_assemble_wav(self):
+        (self.tts_dir / "0001_第1章.wav").write_bytes(_wav(b"\x01\x00" * 16000))
+        (self.tts_dir / "0002_第2章.wav").write_bytes(_wav(b"\x02\x00" * 8000, streaming=True))
+
+        assemble.assemble_volumes(self.novel, volume_step=50, marker_format="ffmetadata")
+
+        joined = (self.out_dir / "novel_vol001.wav").read_bytes()
+        self.assertAlmostEqual(wav_duration(joined), 1.5)
+        self.assertTrue(joined.endswith(b"\x01\x00" * 16000 + b"\x02\x00" * 8000))
+        meta = (self.out_dir / "novel_vol001.ffmeta").read_text(encoding='utf-8')
+        self.assertIn("START=1000\nEND=1500\ntitle=第2章", meta)
+
+    def test_cli(self):
+        (self.tts_dir / "0001_第1章.aac").write_bytes(_adts_frame() * 43)
+        argv = ["novel-cli", "tts-assemble", "-f", str(self.novel), "-n", "10"]
+        out = io.StringIO()
+        with mock.patch("sys.argv", argv), redirect_stdout(out):
+            cli.main()
+        self.assertIn("Success!", out.getvalue())
+        self.assertTrue((self.out_dir / "novel_vol001.aac").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
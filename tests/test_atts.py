@@ -0,0 +1,142 @@
+import asyncio
+import json
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from novel_cli.core import atts
+
+
+class FakeTTSServer:
+    """Minimal HTTP server answering with the chapter title, chunk-encoded."""
+
+    def __init__(self, delay=0.0, status=200, malformed=False):
+        self.delay = delay
+        self.status = status
+        self.malformed = malformed
+        self.active = 0
+        self.max_active = 0
+
+    async def handle(self, reader, writer):
+        headers = {}
+        await reader.readline()
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = json.loads(await reader.readexactly(int(headers["content-length"])))
+
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+
+        if self.malformed:
+            writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n")
+        elif self.status != 200:
+            writer.write(f"HTTP/1.1 {self.status} Bad\r\nContent-Length: 0\r\n\r\n".encode())
+        else:
+            audio = body["text"].splitlines()[0].encode('utf-8')
+            writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n")
+            for part in (audio[:3], audio[3:]):
+                writer.write(f"{len(part):x}\r\n".encode() + part + b"\r\n")
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/tts"
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class TestAsyncTTS(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.sample_path = self.test_dir / "novel.txt"
+        self.sample_path.write_text(
+            "".join(f"第{i}章\nContent {i}\n" for i in range(1, 7)), encoding='utf-8'
+        )
+        self.output_dir = self.test_dir / "novel_tts"
+        self.profile_path = self.test_dir / "profile.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    async def test_aprocess_tts(self):
+        events = []
+        async with FakeTTSServer(delay=0.05) as server:
+            result = await atts.aprocess_tts(
+                self.sample_path, None, 0, server.url, "ref.wav",
+                concurrency=2, on_progress=events.append,
+                profile_path=self.profile_path
+            )
+
+        self.assertEqual(Path(result), self.output_dir)
+        self.assertEqual(len(events), 6)
+        self.assertTrue(all(e.status == "completed" for e in events))
+        self.assertEqual(server.max_active, 2)
+        self.assertEqual((self.output_dir / "0003_第3章.aac").read_text(encoding='utf-8'), "第3章")
+
+    async def test_http_error_is_reported(self):
+        async with FakeTTSServer(status=400) as server:
+            events = [e async for e in atts.aiter_tts(
+                self.sample_path, None, 1, server.url, "ref.wav",
+                profile_path=self.profile_path
+            )]
+        self.assertEqual(events[0].status, "failed")
+        self.assertIn("400", events[0].error)
+
+    async def test_cancel_leaves_no_partial_files(self):
+        async with FakeTTSServer(delay=0.5) as server:
+            task = asyncio.create_task(atts.aprocess_tts(
+                self.sample_path, None, 0, server.url, "ref.wav",
+                concurrency=3, profile_path=self.profile_path
+            ))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        self.assertEqual(list(self.output_dir.iterdir()), [])
+
+    async def test_cancel_with_full_queue_does_not_hang(self):
+        # One worker busy, one chapter queued, the reader blocked on the next
+        async with FakeTTSServer(delay=1) as server:
+            task = asyncio.create_task(atts.aprocess_tts(
+                self.sample_path, None, 0, server.url, "ref.wav",
+                concurrency=1, profile_path=self.profile_path
+            ))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await asyncio.wait_for(task, 0.5)
+
+
+    async def test_malformed_response_is_reported(self):
+        async with FakeTTSServer(malformed=True) as server:
+            with mock.patch.object(atts, "MAX_RETRIES", 1):
+                events = await asyncio.wait_for(self._collect(server, count=2), 5)
+        self.assertEqual([e.status for e in events], ["failed", "failed"])
+        self.assertFalse(list(self.output_dir.iterdir()))
+
+    async def test_worker_error_is_raised(self):
+        with mock.patch.object(atts, "asynthesize_chapter", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                await asyncio.wait_for(atts.aprocess_tts(
+                    self.sample_path, None, 0, "http://127.0.0.1:1/tts", "ref.wav",
+                    concurrency=2, profile_path=self.profile_path
+                ), 5)
+
+    async def _collect(self, server, count):
+        return [e async for e in atts.aiter_tts(
+            self.sample_path, None, count, server.url, "ref.wav",
+            profile_path=self.profile_path
+        )]
+
+if __name__ == '__main__':
+    unittest.main()
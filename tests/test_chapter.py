@@ -45,3 +45,10 @@ Content of chapter 3.
     def test_count_limit(self):
         chapters = list(chapter.iter_chapters(self.sample_file, None, 2))
         self.assertEqual(len(chapters), 2)
+
+    def test_failed_extract_keeps_existing_output(self):
+        output = self.test_dir / "precious.txt"
+        output.write_text("precious", encoding='utf-8')
+        self.assertIsNone(chapter.extract(self.sample_file, "第9章", 1, output_path=output))
+        self.assertEqual(output.read_text(encoding='utf-8'), "precious")
+        self.assertEqual(sorted(p.name for p in self.test_dir.iterdir()), ["precious.txt", "sample.txt"])
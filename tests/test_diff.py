@@ -0,0 +1,114 @@
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+import tempfile
+import shutil
+from pathlib import Path
+from novel_cli.core import diff, tts
+from novel_cli.utils.text import parse_chapter_number
+
+
+class TestDiff(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.old_path = self.test_dir / "old.txt"
+        self.new_path = self.test_dir / "new.txt"
+        self.old_path.write_text(
+            "第1章 开始\n内容一\n"
+            "第2章 中间\n内容二\n"
+            "第3章 插曲\n内容三\n"
+            "第4章 结束\n内容四\n",
+            encoding='utf-8'
+        )
+        # Chapter 2 fixed, chapter 3 dropped, chapter 5 added
+        self.new_path.write_text(
+            "第1章 开始\n内容一\n"
+            "第2章 中间\n内容二（修订）\n"
+            "第4章 结束\n内容四\n"
+            "第5章 尾声\n内容五\n",
+            encoding='gb18030'
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_parse_chapter_number(self):
+        self.assertEqual(parse_chapter_number("第一百零三章 标题"), 103)
+        self.assertEqual(parse_chapter_number("第十二回"), 12)
+        self.assertEqual(parse_chapter_number("第25节"), 25)
+        self.assertEqual(parse_chapter_number("Chapter 7"), 7)
+        self.assertIsNone(parse_chapter_number("序章"))
+
+    def test_diff(self):
+        report = diff.diff_editions(self.old_path, self.new_path)
+        self.assertEqual([c["number"] for c in report["changed"]], [2])
+        self.assertEqual([c["number"] for c in report["removed"]], [3])
+        self.assertEqual([c["number"] for c in report["added"]], [5])
+        # Chapters 1 and 4 match across encodings
+        self.assertEqual(report["unchanged"], 2)
+
+    def test_moved_chapter(self):
+        self.new_path.write_text(
+            "第1章 开始\n内容一\n第3章 中间\n内容二\n", encoding='utf-8'
+        )
+        self.old_path.write_text(
+            "第1章 开始\n内容一\n第2章 中间\n内容二\n", encoding='utf-8'
+        )
+        report = diff.diff_editions(self.old_path, self.new_path)
+        self.assertEqual(report["added"], [])
+        self.assertEqual(report["removed"], [])
+        self.assertEqual(report["moved"], [{"number": 3, "old_number": 2, "title": "第3章 中间"}])
+
+    def test_merge(self):
+        merged, changes = diff.merge_editions(self.old_path, self.new_path)
+        text = Path(merged).read_text(encoding='gb18030')
+        self.assertEqual(
+            [line for line in text.splitlines() if line.startswith("第")],
+            ["第1章 开始", "第2章 中间", "第3章 插曲", "第4章 结束", "第5章 尾声"]
+        )
+        self.assertIn("内容二（修订）", text)
+
+        with open(changes, encoding='utf-8') as f:
+            report = json.load(f)
+        # Positions 2 (revised) and 5 (new) need audio; 1, 3 and 4 keep theirs
+        self.assertEqual(report["resynthesize"], [2, 5])
+        self.assertEqual(diff.load_resynthesize(changes), [2, 5])
+
+    @patch('urllib.request.urlopen')
+    def test_tts_only_replaces_listed_chapters(self, mock_urlopen):
+        merged, changes = diff.merge_editions(self.old_path, self.new_path)
+        output_dir = self.test_dir / "new_merged_tts"
+        output_dir.mkdir()
+        (output_dir / "0001_第1章开始.aac").write_bytes(b"keep")
+        (output_dir / "0002_第2章旧标题.aac").write_bytes(b"stale")
+
+        mock_response = MagicMock()
+        mock_response.status = 200
+        mock_response.read.side_effect = [b"new", b""] * 2
+        mock_urlopen.return_value.__enter__.return_value = mock_response
+
+        tts.process_tts(
+            merged, None, 0, "http://fake.api", "ref.wav",
+            profile_path=self.test_dir / "profile.json",
+            only=diff.load_resynthesize(changes)
+        )
+
+        self.assertEqual(mock_urlopen.call_count, 2)
+        self.assertEqual((output_dir / "0001_第1章开始.aac").read_bytes(), b"keep")
+        self.assertFalse((output_dir / "0002_第2章旧标题.aac").exists())
+        self.assertEqual((output_dir / "0002_第2章中间.aac").read_bytes(), b"new")
+        self.assertTrue((output_dir / "0005_第5章尾声.aac").exists())
+
+    def test_tts_only_rejects_start_pattern(self):
+        merged, changes = diff.merge_editions(self.old_path, self.new_path)
+        with self.assertRaises(ValueError):
+            tts.process_tts(
+                merged, "第2章", 0, "http://fake.api", "ref.wav",
+                profile_path=self.test_dir / "profile.json",
+                only=diff.load_resynthesize(changes)
+            )
+        self.assertFalse((self.test_dir / "new_merged_tts").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
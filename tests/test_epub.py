@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+from novel_cli.core import epub
+
+PATTERN = r"^\s*第[0-9]+章"
+
+
+class TestEpub(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.sample_file = self.test_dir / "sample.txt"
+        lines = ["前言\n"]
+        for c in range(1, 6):
+            lines.append(f"第{c}章 标题<{c}>\n")
+            lines.append(f"正文{c} & 更多。\n\n")
+        self.sample_file.write_text("".join(lines), encoding='utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_export_structure(self):
+        result = Path(epub.export_epub(self.sample_file, volume_step=2, regex_pattern=PATTERN, author="某人"))
+        self.assertEqual(result.name, "sample.epub")
+
+        with zipfile.ZipFile(result) as zf:
+            infos = zf.infolist()
+            self.assertEqual(infos[0].filename, "mimetype")
+            self.assertEqual(infos[0].compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(zf.read("mimetype"), b"application/epub+zip")
+
+            # Every XML document must be well-formed
+            for name in zf.namelist():
+                if name.endswith((".xml", ".opf", ".ncx", ".xhtml")):
+                    ElementTree.fromstring(zf.read(name))
+
+            chapter = zf.read("OEBPS/text/ch00001.xhtml").decode('utf-8')
+            self.assertIn("<h2>第1章 标题&lt;1&gt;</h2>", chapter)
+            self.assertIn("<p>正文1 &amp; 更多。</p>", chapter)
+            self.assertNotIn("前言", chapter)
+
+            opf = zf.read("OEBPS/content.opf").decode('utf-8')
+            self.assertEqual(opf.count("<itemref "), 5)
+            self.assertIn("<dc:creator>某人</dc:creator>", opf)
+
+            nav = zf.read("OEBPS/nav.xhtml").decode('utf-8')
+            self.assertIn("第3卷", nav)
+            self.assertNotIn("第4卷", nav)
+
+            ncx = ElementTree.fromstring(zf.read("OEBPS/toc.ncx"))
+            ns = {"ncx": "http://www.daisy.org/z3986/2005/ncx/"}
+            volumes = ncx.findall("ncx:navMap/ncx:navPoint", ns)
+            self.assertEqual([len(v.findall("ncx:navPoint", ns)) for v in volumes], [2, 2, 1])
+
+    def test_flat_toc_and_no_chapters(self):
+        result = epub.export_epub(self.sample_file, volume_step=0, regex_pattern=PATTERN)
+        with zipfile.ZipFile(result) as zf:
+            self.assertNotIn("卷", zf.read("OEBPS/nav.xhtml").decode('utf-8'))
+
+        empty = self.test_dir / "empty.txt"
+        empty.write_text("没有章节\n", encoding='utf-8')
+        with self.assertRaises(ValueError):
+            epub.export_epub(empty, regex_pattern=PATTERN)
+        self.assertFalse((self.test_dir / "empty.epub").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
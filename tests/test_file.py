@@ -0,0 +1,138 @@
+import bz2
+import gzip
+import io
+import lzma
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from novel_cli.core import chapter, clean, epub, volume
+from novel_cli.core.novel import Novel
+from novel_cli.utils.file import detect_compression, open_input, open_sink
+from novel_cli.utils.text import detect_encoding
+
+PATTERN = r"^\s*第[0-9]+章"
+CONTENT = "前言\n第1章 开始\n这幺好。\n第2章 中间\n第2章 中间\n正文。\n第3章 结束\n完。\n"
+
+
+class TestCompressedInput(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.plain = self.test_dir / "novel.txt"
+        self.plain.write_text(CONTENT, encoding='utf-8')
+        data = CONTENT.encode('utf-8')
+        self.compressed = {
+            "gzip": self.write("novel_gz.txt.gz", gzip.compress(data)),
+            "xz": self.write("novel_xz.txt.xz", lzma.compress(data)),
+            "bz2": self.write("novel_bz2.txt.bz2", bz2.compress(data)),
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, data):
+        path = self.test_dir / name
+        path.write_bytes(data)
+        return path
+
+    def test_detection_by_magic_bytes(self):
+        self.assertIsNone(detect_compression(self.plain))
+        for name, path in self.compressed.items():
+            self.assertEqual(detect_compression(path), name)
+        # The name does not matter, the content does
+        renamed = self.write("novel.txt", gzip.compress(b"x"))
+        self.assertEqual(detect_compression(renamed), "gzip")
+
+        gb = self.write("gb.txt.gz", gzip.compress(CONTENT.encode('gb18030')))
+        self.assertEqual(detect_encoding(gb), "gb18030")
+        with open_input(gb, 'r', encoding='gb18030') as f:
+            self.assertEqual(f.read(), CONTENT)
+
+    def test_paths_read_compressed_input(self):
+        expected_clean = clean.deduplicate_chapters(self.plain, PATTERN).read_text(encoding='utf-8')
+        expected_volumes = Path(volume.add_markers(self.plain, 2, PATTERN)).read_text(encoding='utf-8')
+
+        for name, path in self.compressed.items():
+            titles = [t for t, _, _ in chapter.iter_chapters(path, None, 0, PATTERN)]
+            self.assertEqual(titles, ["第1章 开始", "第2章 中间", "第2章 中间", "第3章 结束"], name)
+
+            result = Path(volume.add_markers(path, 2, PATTERN))
+            self.assertEqual(result.name, f"novel_{name.replace('gzip', 'gz')}_with_volumes.txt")
+            self.assertEqual(result.read_text(encoding='utf-8'), expected_volumes)
+
+            for budget in (None, 1024 * 1024):
+                cleaned = clean.deduplicate_chapters(path, PATTERN, max_memory=budget)
+                self.assertEqual(cleaned.read_text(encoding='utf-8'), expected_clean)
+
+            self.assertTrue(epub.export_epub(path, regex_pattern=PATTERN).endswith(".epub"))
+
+            with self.assertRaises(ValueError):
+                Novel(path, PATTERN)
+
+    def test_compressed_output(self):
+        result = Path(chapter.extract(self.compressed["xz"], "第3章", 1, PATTERN, compression="bz2"))
+        self.assertEqual(result.name, "novel_xz_第3章结束.txt.bz2")
+        self.assertEqual(bz2.decompress(result.read_bytes()).decode('utf-8'), "第3章 结束\n完。\n")
+
+        cleaned = clean.deduplicate_chapters(self.plain, PATTERN, compression="gzip")
+        self.assertEqual(cleaned.name, "novel_clean.txt.gz")
+        self.assertNotIn("这幺", gzip.decompress(cleaned.read_bytes()).decode('utf-8'))
+
+
+class TestOutputSink(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.target = self.test_dir / "out.txt"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_failed_write_keeps_previous_output(self):
+        self.target.write_text("old", encoding='utf-8')
+        with self.assertRaises(RuntimeError):
+            with open_sink(self.target) as f:
+                f.write("new")
+                raise RuntimeError("boom")
+        self.assertEqual(self.target.read_text(encoding='utf-8'), "old")
+        self.assertEqual(list(self.test_dir.iterdir()), [self.target])
+
+        with open_sink(self.target, encoding='gb18030', compression="xz") as f:
+            f.write("新内容")
+        self.assertEqual(lzma.decompress(self.target.read_bytes()).decode('gb18030'), "新内容")
+
+    def test_bytes_and_fsync(self):
+        with patch("novel_cli.utils.file.os.fsync") as fsync:
+            with open_sink(self.target, encoding=None, fsync=True) as f:
+                f.write(b"raw bytes")
+        # The file before the rename, the directory after it
+        self.assertEqual(fsync.call_count, 2)
+        self.assertEqual(self.target.read_bytes(), b"raw bytes")
+
+    def test_stdout_target(self):
+        buffer = io.BytesIO()
+        stdout = io.TextIOWrapper(buffer, encoding='utf-8')
+        with patch("sys.stdout", stdout):
+            with open_sink("-", compression="gzip") as f:
+                f.write("第1章\n")
+        self.assertFalse(buffer.closed)
+        self.assertEqual(gzip.decompress(buffer.getvalue()).decode('utf-8'), "第1章\n")
+
+    def test_commands_write_to_explicit_output(self):
+        source = self.test_dir / "novel.txt"
+        source.write_text(CONTENT, encoding='utf-8')
+        result = chapter.extract(source, "第2章", 1, PATTERN, output_path=self.target, fsync=True)
+        self.assertEqual(result, str(self.target))
+        self.assertEqual(self.target.read_text(encoding='utf-8'), "第2章 中间\n")
+        self.assertIsNone(chapter.extract(source, "第9章", 1, PATTERN, output_path=self.test_dir / "none.txt"))
+
+        buffer = io.BytesIO()
+        stdout = io.TextIOWrapper(buffer, encoding='utf-8')
+        with patch("sys.stdout", stdout):
+            volume.add_markers(source, 2, PATTERN, output_path="-")
+        self.assertIn("第2卷", buffer.getvalue().decode('utf-8'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+from novel_cli.core import chapter, volume
+from novel_cli.core.clean import deduplicate_chapters
+from novel_cli.utils.memory import MIN_MEMORY_BUDGET, MemoryBudgetError, parse_size
+
+PATTERN = r"^\s*第[0-9]+章"
+
+# Budget-mode peaks must stay flat while the input is several times larger
+BUDGET = 2 * MIN_MEMORY_BUDGET
+PEAK_LIMIT = 512 * 1024
+
+
+class TestMemoryBudget(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.test_dir = Path(tempfile.mkdtemp())
+        cls.novel = cls.test_dir / "large.txt"
+        body = "这幺好的天气，那么多人在外面散步。" * 3 + "\n"
+        with cls.novel.open('w', encoding='utf-8') as f:
+            for c in range(1, 301):
+                f.write(f"第{c}章 标题{c}\n")
+                if c % 50 == 0:
+                    # Duplicate title with more indentation
+                    f.write(f"  第{c}章 标题{c}\n")
+                f.writelines([body] * 200)
+        cls.size = cls.novel.stat().st_size
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.test_dir)
+
+    def measure_peak(self, fn):
+        tracemalloc.start()
+        try:
+            result = fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return result, peak
+
+    def test_input_is_large(self):
+        self.assertGreater(self.size, 4 * BUDGET)
+
+    def test_deduplicate_chapters_streams_under_budget(self):
+        expected = deduplicate_chapters(self.novel, PATTERN).read_bytes()
+
+        output, peak = self.measure_peak(
+            lambda: deduplicate_chapters(self.novel, PATTERN, max_memory=BUDGET)
+        )
+        self.assertLess(peak, PEAK_LIMIT)
+        self.assertEqual(output.read_bytes(), expected)
+        self.assertNotIn("  第50章", output.read_text(encoding='utf-8'))
+
+    def test_small_file_stays_under_budget(self):
+        # Short lines: a few hundred KB on disk, several MB as Python strings
+        path = self.test_dir / "short_lines.txt"
+        with path.open('w', encoding='utf-8') as f:
+            for c in range(1, 51):
+                f.write(f"第{c}章\n")
+                f.writelines(["这幺。\n"] * 800)
+        self.assertLess(path.stat().st_size * 4, BUDGET)
+
+        output, peak = self.measure_peak(lambda: deduplicate_chapters(path, PATTERN, max_memory=BUDGET))
+        self.assertLess(peak, PEAK_LIMIT)
+        self.assertEqual(output.read_bytes(), deduplicate_chapters(path, PATTERN).read_bytes())
+
+    def test_add_markers_peak(self):
+        output, peak = self.measure_peak(lambda: volume.add_markers(self.novel, 50, PATTERN, max_memory=BUDGET))
+        self.assertLess(peak, PEAK_LIMIT)
+        self.assertIn("\n第6卷\n", Path(output).read_text(encoding='utf-8'))
+
+    def test_extract_peak(self):
+        output, peak = self.measure_peak(lambda: chapter.extract(self.novel, None, 0, PATTERN, max_memory=BUDGET))
+        self.assertLess(peak, PEAK_LIMIT)
+        self.assertTrue(Path(output).read_text(encoding='utf-8').startswith("第1章"))
+
+    def test_iter_chapters_peak(self):
+        def consume():
+            count = 0
+            for _ in chapter.iter_chapters(self.novel, None, 0, PATTERN, max_memory=BUDGET):
+                count += 1
+            return count
+
+        count, peak = self.measure_peak(consume)
+        self.assertLess(peak, PEAK_LIMIT)
+        self.assertEqual(count, 306)
+
+    def test_budget_below_minimum_fails_fast(self):
+        for call in (
+            lambda: deduplicate_chapters(self.novel, PATTERN, max_memory=1024),
+            lambda: volume.add_markers(self.novel, 50, PATTERN, max_memory=1024),
+            lambda: chapter.extract(self.novel, None, 1, PATTERN, max_memory=1024),
+        ):
+            with self.assertRaises(MemoryBudgetError):
+                call()
+
+    def test_oversized_line_and_chapter(self):
+        path = self.test_dir / "long_line.txt"
+        path.write_text("第1章 一\n" + "字" * MIN_MEMORY_BUDGET + "\n", encoding='utf-8')
+        with self.assertRaises(MemoryBudgetError):
+            volume.add_markers(path, 50, PATTERN, max_memory=MIN_MEMORY_BUDGET)
+
+        path = self.test_dir / "long_chapter.txt"
+        path.write_text("第1章 一\n" + ("字" * 1000 + "\n") * 200, encoding='utf-8')
+        with self.assertRaises(MemoryBudgetError):
+            list(chapter.iter_chapters(path, None, 0, PATTERN, max_memory=MIN_MEMORY_BUDGET))
+        # extract streams the same chapter fine
+        self.assertIsNotNone(chapter.extract(path, None, 0, PATTERN, max_memory=MIN_MEMORY_BUDGET))
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size("4096"), 4096)
+        self.assertEqual(parse_size("512K"), 512 * 1024)
+        self.assertEqual(parse_size("64m"), 64 * 1024 ** 2)
+        self.assertEqual(parse_size("2GiB"), 2 * 1024 ** 3)
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+
+if __name__ == '__main__':
+    unittest.main()
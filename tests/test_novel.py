@@ -0,0 +1,89 @@
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from novel_cli import Novel
+from novel_cli.core import chapter
+from novel_cli.core.novel import scan_chapter_offsets
+
+
+class TestNovel(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.sample_file = self.test_dir / "sample.txt"
+        content = "Preface\n\n" + "".join(
+            f"第{i}章 标题{i}\n第{i}章的内容。\n" for i in range(1, 11)
+        )
+        self.sample_file.write_text(content, encoding='utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_sequence_access(self):
+        with Novel(self.sample_file) as novel:
+            self.assertEqual(len(novel), 10)
+            self.assertEqual(novel[0].title, "第1章 标题1")
+            self.assertEqual(novel[-1].number, 10)
+            self.assertEqual([c.number for c in novel[2:5]], [3, 4, 5])
+            self.assertEqual(novel[3].text, "第4章 标题4\n第4章的内容。\n")
+            with self.assertRaises(IndexError):
+                novel[10]
+
+    def test_matches_iter_chapters(self):
+        expected = list(chapter.iter_chapters(self.sample_file, None, 0))
+        with Novel(self.sample_file) as novel:
+            self.assertEqual([(c.title, c.text, c.number) for c in novel], expected)
+
+    def test_crlf_matches_iter_chapters(self):
+        crlf_file = self.test_dir / "crlf.txt"
+        crlf_file.write_bytes(self.sample_file.read_bytes().replace(b"\n", b"\r\n"))
+        expected = list(chapter.iter_chapters(crlf_file, None, 0))
+        with Novel(crlf_file) as novel:
+            self.assertEqual([(c.title, c.text, c.number) for c in novel], expected)
+            self.assertEqual(novel[0].text, "第1章 标题1\n第1章的内容。\n")
+
+    def test_closes_file_when_index_fails(self):
+        opened = []
+        real_open = Path.open
+
+        def tracking_open(path, *args, **kwargs):
+            f = real_open(path, *args, **kwargs)
+            opened.append(f)
+            return f
+
+        with mock.patch.object(Path, "open", tracking_open), \
+                mock.patch("novel_cli.core.novel.scan_chapter_offsets", side_effect=ValueError("boom")):
+            with self.assertRaises(ValueError):
+                Novel(self.sample_file, encoding='utf-8')
+        self.assertTrue(opened)
+        self.assertTrue(all(f.closed for f in opened))
+
+    def test_lookup(self):
+        with Novel(self.sample_file) as novel:
+            self.assertEqual(novel.find("标题7").number, 7)
+            self.assertIsNone(novel.find("第99章"))
+            self.assertEqual(novel.chapter(5).title, "第5章 标题5")
+
+    def test_prefiltered_scan_matches_line_scan(self):
+        # (?i) disables the literal prefilter, forcing the line-by-line scan
+        fast = r"^\s*第[0-9]+章"
+        slow = r"(?i)" + fast
+        path = self.test_dir / "mixed.txt"
+        text = "第一次见面\n" + "".join(f"第{i}章 题\n他是第{i}个。\r\n" for i in range(1, 30)) + "第30章"
+        for encoding in ('utf-8', 'gb18030'):
+            path.write_bytes(text.encode(encoding))
+            expected = scan_chapter_offsets(path, encoding, slow)
+            titles, offsets, size = scan_chapter_offsets(path, encoding, fast)
+            self.assertEqual((titles, list(offsets), size), (expected[0], list(expected[1]), expected[2]))
+            self.assertEqual(len(titles), 30)
+            # Resuming from a chapter offset sees only the rest
+            resumed = scan_chapter_offsets(path, encoding, fast, start=offsets[10])
+            self.assertEqual(list(resumed[1]), list(offsets[10:]))
+
+    def test_gb18030(self):
+        gb_file = self.test_dir / "gb.txt"
+        gb_file.write_bytes("第1章 开始\n内容\n第2章 结束\n完\n".encode('gb18030'))
+        with Novel(gb_file) as novel:
+            self.assertEqual(novel.encoding, 'gb18030')
+            self.assertEqual(novel[1].text, "第2章 结束\n完\n")
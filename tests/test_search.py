@@ -0,0 +1,64 @@
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from novel_cli.core import search
+
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.sample_path = self.test_dir / "novel.txt"
+        self.sample_path.write_text(
+            "第1章 出发\n张三走出家门，天色已晚。\n"
+            "第2章 相遇\n李四在桥头等着张三。\n"
+            "第3章 分别\n两人就此别过。\n",
+            encoding='utf-8'
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_phrase_search(self):
+        hits = search.search(self.sample_path, "张三")
+        self.assertEqual([h.number for h in hits], [1, 2])
+        self.assertEqual(hits[1].title, "第2章 相遇")
+        self.assertIn("等着张三", hits[1].snippet)
+
+        self.assertEqual([h.number for h in search.search(self.sample_path, "桥头等")], [2])
+        self.assertEqual(search.search(self.sample_path, "张四"), [])
+
+    def test_multiple_terms_and_single_char(self):
+        self.assertEqual([h.number for h in search.search(self.sample_path, "张三 李四")], [2])
+        self.assertEqual([h.number for h in search.search(self.sample_path, "桥")], [2])
+
+    def test_single_char_at_token_end(self):
+        # "三" only ends tokens or lines; "我" is a one-character token
+        with self.sample_path.open('a', encoding='utf-8') as f:
+            f.write("第4章 独白\n我 说\n")
+        hits = search.search(self.sample_path, "三")
+        self.assertEqual([h.number for h in hits], [1, 2])
+        self.assertEqual(hits[1].count, 1)
+        self.assertEqual([h.number for h in search.search(self.sample_path, "我")], [4])
+        self.assertEqual([h.number for h in search.search(self.sample_path, "说")], [4])
+
+    def test_incremental_append(self):
+        search.search(self.sample_path, "张三")
+        with self.sample_path.open('a', encoding='utf-8') as f:
+            f.write("张三回头望了一眼。\n第4章 重逢\n张三与李四重逢。\n")
+
+        hits = search.search(self.sample_path, "张三")
+        self.assertEqual([h.number for h in hits], [1, 2, 3, 4])
+        self.assertEqual(hits[2].count, 1)
+        segments = sorted((self.test_dir / "novel_search").glob("seg-*.idx"))
+        self.assertEqual(len(segments), 2)
+
+    def test_rebuild_on_edit(self):
+        search.search(self.sample_path, "张三")
+        self.sample_path.write_text("第1章 新\n王五登场。\n", encoding='utf-8')
+        self.assertEqual(search.search(self.sample_path, "张三"), [])
+        self.assertEqual([h.number for h in search.search(self.sample_path, "王五")], [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from novel_cli.core import serve
+
+
+class TestServe(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.sample_path = self.test_dir / "novel.txt"
+        self.sample_path.write_text(
+            "".join(f"第{i}章 标题{i}\n内容{i}\n" for i in range(1, 6)), encoding='utf-8'
+        )
+        ready = asyncio.get_running_loop().create_future()
+        self.server = asyncio.create_task(serve.serve(port=0, ready=ready, root=self.test_dir))
+        self.host, self.port = await ready
+
+    async def asyncTearDown(self):
+        self.server.cancel()
+        await asyncio.gather(self.server, return_exceptions=True)
+        shutil.rmtree(self.test_dir)
+
+    async def _exchange(self, reader, writer, request, headers):
+        body = json.dumps(request).encode('utf-8')
+        head = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(
+            f"POST / HTTP/1.1\r\n{head}Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        status = (await reader.readline()).decode().split(" ", 1)[1].strip()
+        response_headers = {}
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        return status, json.loads(await reader.readexactly(int(response_headers["content-length"])))
+
+    async def _post_many(self, requests):
+        """Sends requests over one keep-alive connection."""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        headers = {"Host": f"127.0.0.1:{self.port}", "Content-Type": "application/json"}
+        responses = []
+        for request in requests:
+            _, response = await self._exchange(reader, writer, request, headers)
+            responses.append(response)
+        writer.close()
+        return responses
+
+    async def _post_with_headers(self, headers):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            return await self._exchange(reader, writer, {"op": "ping"}, headers)
+        finally:
+            writer.close()
+
+    async def test_chapters_and_range(self):
+        listing, chapter_range = await self._post_many([
+            {"op": "chapters", "file": str(self.sample_path)},
+            {"op": "range", "file": str(self.sample_path), "start": "第2章", "count": 2},
+        ])
+        self.assertTrue(listing["ok"])
+        self.assertEqual(len(listing["chapters"]), 5)
+        self.assertEqual(
+            [c["text"] for c in chapter_range["chapters"]],
+            ["第2章 标题2\n内容2\n", "第3章 标题3\n内容3\n"]
+        )
+
+    async def test_cache_invalidated_on_change(self):
+        (first,) = await self._post_many([{"op": "chapters", "file": str(self.sample_path)}])
+        with self.sample_path.open('a', encoding='utf-8') as f:
+            f.write("第6章 标题6\n内容6\n")
+        stat = self.sample_path.stat()
+        os.utime(self.sample_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        (second,) = await self._post_many([{"op": "chapters", "file": str(self.sample_path)}])
+        self.assertEqual(len(first["chapters"]), 5)
+        self.assertEqual(len(second["chapters"]), 6)
+
+    async def test_errors_are_reported(self):
+        missing, unknown = await self._post_many([
+            {"op": "range", "file": str(self.sample_path), "start": "第99章"},
+            {"op": "nope"},
+        ])
+        self.assertFalse(missing["ok"])
+        self.assertIn("not found", missing["error"])
+        self.assertFalse(unknown["ok"])
+
+    async def test_range_bounds(self):
+        responses = await self._post_many([
+            {"op": "range", "file": str(self.sample_path), "number": -3, "count": 1},
+            {"op": "range", "file": str(self.sample_path), "number": 0},
+            {"op": "range", "file": str(self.sample_path), "number": 6},
+            {"op": "range", "file": str(self.sample_path), "number": 1, "count": -1},
+        ])
+        self.assertEqual([r["ok"] for r in responses], [False] * 4)
+        self.assertNotIn("chapters", responses[0])
+        (last,) = await self._post_many([
+            {"op": "range", "file": str(self.sample_path), "number": 4, "count": 0},
+        ])
+        self.assertEqual([c["number"] for c in last["chapters"]], [4, 5])
+
+    async def test_http_requires_json_and_loopback_host(self):
+        json_type = {"Content-Type": "application/json; charset=utf-8"}
+        for host in ("localhost", f"127.0.0.1:{self.port}", "[::1]:8765"):
+            status, response = await self._post_with_headers({"Host": host, **json_type})
+            self.assertEqual(status, "200 OK", host)
+            self.assertTrue(response["ok"])
+
+        # A form post from a web page, and a rebound DNS name
+        status, _ = await self._post_with_headers({"Host": "localhost", "Content-Type": "text/plain"})
+        self.assertEqual(status, "415 Unsupported Media Type")
+        status, _ = await self._post_with_headers({"Host": f"evil.example:{self.port}", **json_type})
+        self.assertEqual(status, "403 Forbidden")
+        status, _ = await self._post_with_headers(json_type)
+        self.assertEqual(status, "403 Forbidden")
+
+    async def test_files_outside_root_are_refused(self):
+        outside = Path(tempfile.mkdtemp())
+        try:
+            (outside / "other.txt").write_text("第1章 外\n", encoding='utf-8')
+            absolute, relative, inside = await self._post_many([
+                {"op": "chapters", "file": str(outside / "other.txt")},
+                {"op": "tts", "file": f"../{outside.name}/other.txt"},
+                {"op": "chapters", "file": "novel.txt"},
+            ])
+        finally:
+            shutil.rmtree(outside)
+        self.assertFalse(absolute["ok"])
+        self.assertIn("outside the served root", absolute["error"])
+        self.assertFalse(relative["ok"])
+        self.assertTrue(inside["ok"])
+        self.assertEqual(len(inside["chapters"]), 5)
+
+    async def test_unix_socket(self):
+        socket_path = self.test_dir / "novel.sock"
+        ready = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(serve.serve(socket_path=socket_path, ready=ready, root=self.test_dir))
+        await ready
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(socket_path))
+            writer.write(json.dumps({"op": "range", "file": str(self.sample_path), "number": 5}).encode() + b"\n")
+            response = json.loads(await reader.readline())
+            writer.close()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self.assertEqual(response["chapters"][0]["title"], "第5章 标题5")
+
+
+    async def test_socket_path_must_not_be_a_regular_file(self):
+        precious = self.test_dir / "precious.txt"
+        precious.write_text("precious", encoding='utf-8')
+        with self.assertRaises(FileExistsError):
+            await serve.serve(socket_path=precious, root=self.test_dir)
+        self.assertEqual(precious.read_text(encoding='utf-8'), "precious")
+
+
+class TestNovelCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.paths = []
+        for name in ("a.txt", "b.txt"):
+            path = self.test_dir / name
+            path.write_text(f"第1章 {name}\n内容\n", encoding='utf-8')
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_evicted_novel_stays_open_while_borrowed(self):
+        cache = serve.NovelCache(capacity=1)
+        with cache.borrow(self.paths[0]) as first:
+            # Evicts the first novel while it is still being read
+            with cache.borrow(self.paths[1]) as second:
+                self.assertEqual(second[0].title, "第1章 b.txt")
+            self.assertEqual(first[0].text, "第1章 a.txt\n内容\n")
+        with self.assertRaises(ValueError):
+            first[0].text
+        cache.close()
+        with self.assertRaises(ValueError):
+            second[0].text
+
+
+if __name__ == '__main__':
+    unittest.main()
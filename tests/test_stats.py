@@ -0,0 +1,78 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from novel_cli.core import stats
+
+PATTERN = r"^\s*第[0-9零一二三四五六七八九十百]+章"
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.sample_file = self.test_dir / "sample.txt"
+        chapters = [
+            ("第1章 开始", "一二三四五"),
+            ("第2章 中间", "六七 八九　十"),
+            ("第2章 中间", "重复"),
+            ("第5章 跳跃", "跳"),
+            ("第四章 回来", "回来了"),
+            ("第6章 结束", "完"),
+        ]
+        self.sample_file.write_text(
+            "前言\n" + "".join(f"{title}\n{body}\n" for title, body in chapters), encoding='utf-8'
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_columns(self):
+        result = stats.collect_stats(self.sample_file, PATTERN)
+        self.assertEqual(len(result.titles), 6)
+        self.assertEqual(result.chars.typecode, 'q')
+        # Whitespace is not counted; the title line is
+        self.assertEqual(result.chars[0], len("第1章开始") + 5)
+        self.assertEqual(result.chars[1], len("第2章中间") + 5)
+        self.assertEqual(list(result.numbers), [1, 2, 2, 5, 4, 6])
+        self.assertEqual(sum(result.lengths) + len("前言\n".encode('utf-8')), self.sample_file.stat().st_size)
+
+    def test_summary(self):
+        summary = stats.summarize(stats.collect_stats(self.sample_file, PATTERN), chars_per_second=2)
+        self.assertEqual(summary["chapters"], 6)
+        self.assertEqual(summary["duration_seconds"], summary["characters"] / 2)
+        self.assertEqual(summary["duplicate_titles"], [{"title": "第2章 中间", "count": 2}])
+        numbering = summary["numbering"]
+        self.assertEqual(numbering["missing"], [{"first": 3, "last": 3}])
+        self.assertEqual(numbering["repeated"], [{"number": 2, "count": 2}])
+        self.assertEqual(
+            numbering["out_of_order"], [{"index": 5, "title": "第四章 回来", "number": 4, "after": 5}]
+        )
+        chars = summary["chars"]
+        self.assertLessEqual(chars["min"], chars["p50"])
+        self.assertLessEqual(chars["p90"], chars["max"])
+        # Round-trips through JSON
+        self.assertEqual(json.loads(json.dumps(summary, ensure_ascii=False)), summary)
+
+        text = stats.format_summary(stats.summarize(stats.collect_stats(self.sample_file, PATTERN), per_chapter=True))
+        self.assertIn("Duplicate titles (1):", text)
+        self.assertIn("#5 第四章 回来 (after 5)", text)
+        self.assertIn("第6章 结束", text.splitlines()[-1])
+
+    def test_percentile(self):
+        self.assertEqual(stats.percentile([1, 2, 3, 4], 50), 2.5)
+        self.assertEqual(stats.percentile([7], 99), 7)
+        self.assertEqual(stats.percentile([], 50), 0.0)
+
+    def test_no_chapters(self):
+        empty = self.test_dir / "empty.txt"
+        empty.write_text("", encoding='utf-8')
+        summary = stats.summarize(stats.collect_stats(empty, PATTERN))
+        self.assertEqual(summary["chapters"], 0)
+        self.assertEqual(summary["chars"]["max"], 0.0)
+        stats.format_summary(summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import re
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from novel_cli.core import chapter
+from novel_cli.utils.text import (
+    BUILTIN_PATTERNS,
+    DEFAULT_CHAPTER_PATTERN,
+    combine_patterns,
+    extract_literals,
+    get_chapter_matcher,
+)
+
+
+class TestChapterMatcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_extract_literals(self):
+        self.assertEqual(extract_literals(DEFAULT_CHAPTER_PATTERN), {"第"})
+        self.assertEqual(extract_literals(BUILTIN_PATTERNS["english"]), {"Chapter"})
+        self.assertEqual(extract_literals(r"^\s*(?:第|Chapter)\d+"), {"第", "Chapter"})
+        self.assertEqual(extract_literals(r"^\d+\."), {"."})
+        # Nothing required, or case-insensitive: no prefilter
+        self.assertIsNone(extract_literals(r"^\d+\s"))
+        self.assertIsNone(extract_literals(r"(?i)^chapter \d+"))
+        self.assertIsNone(extract_literals(r"^(?:第\d+章|\d+\s)"))
+
+    def test_combine_patterns(self):
+        # A single bare regex is passed through untouched
+        self.assertEqual(combine_patterns([r"^Part \d+"]), r"^Part \d+")
+        self.assertEqual(combine_patterns([]), DEFAULT_CHAPTER_PATTERN)
+
+        pattern = combine_patterns(["chapter", "volume", "prologue", "part=^Part \\d+"])
+        matcher = get_chapter_matcher(pattern)
+        self.assertEqual(matcher.literals, {"第", "序章", "序言", "楔子", "引子", "Part "})
+        self.assertEqual(matcher.match("第12章 开始").lastgroup, "chapter")
+        self.assertEqual(matcher.match("第二卷 风起\n").lastgroup, "volume")
+        self.assertEqual(matcher.match("楔子\n").lastgroup, "prologue")
+        self.assertEqual(matcher.match("Part 3\n").lastgroup, "part")
+        self.assertIsNone(matcher.match("他说第一章写得不好\n"))
+
+    def test_matches_agree_with_regex(self):
+        pattern = combine_patterns(["chapter", "english", "prologue"])
+        regex = re.compile(pattern)
+        matcher = get_chapter_matcher(pattern)
+        lines = [
+            "第1章 起\n", "  第十章\n", "第1章起\n", "Chapter 7 Dawn\n", "chapter 7\n",
+            "序言\n", "序言之后\n", "普通正文。\n", "\n", "第\n",
+        ]
+        for line in lines:
+            self.assertEqual(bool(matcher.match(line)), bool(regex.match(line)), line)
+
+    def test_extract_with_multiple_patterns(self):
+        sample = self.test_dir / "sample.txt"
+        sample.write_text("楔子\n缘起。\n第1章 一\n正文一。\n第2章 二\n正文二。\n", encoding='utf-8')
+        titles = [t for t, _, _ in chapter.iter_chapters(
+            sample, None, 3, combine_patterns(["prologue", "chapter"])
+        )]
+        self.assertEqual(titles, ["楔子", "第1章 一", "第2章 二"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import io
+import json
 import unittest
 from unittest.mock import patch, MagicMock
 import tempfile
@@ -5,6 +7,18 @@ import shutil
 from pathlib import Path
 from novel_cli.core import tts
 
+
+def _fake_urlopen(req, timeout=None):
+    """Returns a response whose body is the chapter title from the request."""
+    text = json.loads(req.data)["text"]
+    response = MagicMock()
+    response.status = 200
+    response.read.side_effect = io.BytesIO(text.splitlines()[0].encode('utf-8')).read
+    cm = MagicMock()
+    cm.__enter__.return_value = response
+    return cm
+
+
 class TestTTS(unittest.TestCase):
     def setUp(self):
         self.test_dir = Path(tempfile.mkdtemp())
@@ -20,7 +34,7 @@ class TestTTS(unittest.TestCase):
         # Mock response
         mock_response = MagicMock()
         mock_response.status = 200
-        mock_response.read.return_value = b"fake_audio_data"
+        mock_response.read.side_effect = [b"fake_audio_data", b""]
         mock_urlopen.return_value.__enter__.return_value = mock_response
 
         tts.process_tts(
@@ -33,13 +47,52 @@ class TestTTS(unittest.TestCase):
         )
         
         # Verify file created
-        # 1_One (sanitized) -> 0001_One.wav
+        # 1_One (sanitized) -> 0001_One.aac
         # sanitize_filename removes spaces but keeps Chinese characters (isalnum)
         # "第1章 One" -> "第1章One"
-        expected_file = self.output_dir / "0001_第1章One.wav"
+        expected_file = self.output_dir / "0001_第1章One.aac"
         # We need to verify if the file exists. 
         # But wait, tts.py creates directory: input_file.parent / f"{input_file.stem}_tts"
         # stem is "novel", so "novel_tts"
         
         self.assertTrue(expected_file.exists())
         self.assertEqual(expected_file.read_bytes(), b"fake_audio_data")
+
+    @patch('urllib.request.urlopen', side_effect=_fake_urlopen)
+    def test_listen_ahead_streams_in_order(self, mock_urlopen):
+        self.sample_path.write_text(
+            "".join(f"第{i}章\nContent {i}\n" for i in range(1, 6)), encoding='utf-8'
+        )
+        stream_path = self.test_dir / "stream.aac"
+
+        tts.process_tts(
+            self.sample_path,
+            None,
+            0,
+            "http://fake.api",
+            "ref.wav",
+            concurrency=2,
+            stream_to=stream_path,
+            prefetch=2
+        )
+
+        expected = "".join(f"第{i}章" for i in range(1, 6))
+        self.assertEqual(stream_path.read_text(encoding='utf-8'), expected)
+        self.assertEqual(mock_urlopen.call_count, 5)
+        self.assertEqual(len(list(self.output_dir.glob("*.aac"))), 5)
+
+    @patch('urllib.request.urlopen', side_effect=_fake_urlopen)
+    def test_listen_ahead_without_prefetch(self, mock_urlopen):
+        self.sample_path.write_text(
+            "".join(f"第{i}章\nContent {i}\n" for i in range(1, 6)), encoding='utf-8'
+        )
+        stream_path = self.test_dir / "stream.aac"
+
+        tts.process_tts(
+            self.sample_path, None, 0, "http://fake.api", "ref.wav",
+            stream_to=stream_path, prefetch=0
+        )
+
+        expected = "".join(f"第{i}章" for i in range(1, 6))
+        self.assertEqual(stream_path.read_text(encoding='utf-8'), expected)
+        self.assertEqual(mock_urlopen.call_count, 5)
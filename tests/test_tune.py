@@ -0,0 +1,114 @@
+import http.client
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+import tempfile
+import shutil
+from pathlib import Path
+from novel_cli.core import tts, tune
+from novel_cli.utils.audio import adts_duration
+
+
+def _adts_frame(payload_size=9):
+    """Builds one 44.1 kHz stereo ADTS frame with a dummy payload."""
+    length = 7 + payload_size
+    header = bytes([
+        0xFF, 0xF1,
+        (1 << 6) | (4 << 2),
+        (2 << 6) | (length >> 11),
+        (length >> 3) & 0xFF,
+        ((length & 0x07) << 5) | 0x1F,
+        0xFC,
+    ])
+    return header + bytes(payload_size)
+
+
+class TestTune(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.sample_path = self.test_dir / "novel.txt"
+        self.sample_path.write_text(
+            "".join(f"第{i}章\nContent {i}\n" for i in range(1, 4)), encoding='utf-8'
+        )
+        self.profile_path = self.test_dir / "profile.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_adts_duration(self):
+        data = _adts_frame() * 441
+        self.assertAlmostEqual(adts_duration(data), 441 * 1024 / 44100)
+
+    @patch('urllib.request.urlopen')
+    def test_tune_writes_best_profile(self, mock_urlopen):
+        def fake_urlopen(req, timeout=None):
+            payload = json.loads(req.data)
+            # Pretend larger batches produce more audio per request
+            response = MagicMock()
+            response.status = 200
+            response.read.return_value = _adts_frame() * payload["batch_size"]
+            cm = MagicMock()
+            cm.__enter__.return_value = response
+            return cm
+        mock_urlopen.side_effect = fake_urlopen
+
+        result = tune.tune_tts(
+            self.sample_path,
+            "http://fake.api",
+            "ref.wav",
+            batch_sizes=[4, 16],
+            split_methods=["cut3"],
+            concurrencies=[1],
+            profile_path=self.profile_path
+        )
+
+        self.assertEqual(Path(result), self.profile_path)
+        profile = tts.load_profile("http://fake.api", self.profile_path)
+        self.assertEqual(profile["batch_size"], 16)
+        self.assertEqual(profile["text_split_method"], "cut3")
+        self.assertEqual(tts.load_profile("http://other.api", self.profile_path), {})
+
+    @patch('urllib.request.urlopen')
+    def test_read_errors_fail_only_that_trial(self, mock_urlopen):
+        errors = {16: ConnectionResetError("reset"), 32: http.client.IncompleteRead(b"")}
+
+        def fake_urlopen(req, timeout=None):
+            payload = json.loads(req.data)
+            response = MagicMock()
+            response.status = 200
+            if payload["batch_size"] in errors:
+                response.read.side_effect = errors[payload["batch_size"]]
+            else:
+                response.read.return_value = _adts_frame() * payload["batch_size"]
+            cm = MagicMock()
+            cm.__enter__.return_value = response
+            return cm
+        mock_urlopen.side_effect = fake_urlopen
+
+        tune.tune_tts(
+            self.sample_path, "http://fake.api", "ref.wav",
+            batch_sizes=[4, 16, 32], split_methods=["cut3"], concurrencies=[1],
+            profile_path=self.profile_path
+        )
+        self.assertNotIn(tts.load_profile("http://fake.api", self.profile_path)["batch_size"], errors)
+
+    @patch('urllib.request.urlopen')
+    def test_process_tts_loads_profile(self, mock_urlopen):
+        tts.save_profile(
+            "http://fake.api",
+            {"batch_size": 32, "text_split_method": "cut5", "concurrency": 2},
+            self.profile_path
+        )
+        mock_response = MagicMock()
+        mock_response.status = 200
+        mock_response.read.side_effect = [b"audio", b""] * 3
+        mock_urlopen.return_value.__enter__.return_value = mock_response
+
+        tts.process_tts(
+            self.sample_path, None, 1, "http://fake.api", "ref.wav",
+            profile_path=self.profile_path
+        )
+
+        payload = json.loads(mock_urlopen.call_args[0][0].data)
+        self.assertEqual(payload["batch_size"], 32)
+        self.assertEqual(payload["text_split_method"], "cut5")